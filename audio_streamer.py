@@ -6,6 +6,7 @@ Streams an MP3 file to an Icecast server in a continuous loop.
 
 __version__ = "0.0.3"
 
+import asyncio
 import subprocess
 import sys
 import os
@@ -15,10 +16,68 @@ import signal
 import json
 import threading
 import hashlib
+import socket
+import ssl
+import struct
+import base64
+import bisect
+import collections
+import copy
+import math
+import random
+import re
+import multiprocessing
+import multiprocessing.connection
 import urllib.request
 import urllib.error
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Iterator, Callable
+
+
+# Supported output codecs: FFmpeg encoder, default container (muxer) and content type,
+# the codec_name ffprobe reports for it, and the sample rate used unless one is configured
+CODECS = {
+    'mp3': {'encoder': 'libmp3lame', 'container': 'mp3', 'content_type': 'audio/mpeg',
+            'probe_name': 'mp3', 'sample_rate': 44100},
+    'aac': {'encoder': 'aac', 'container': 'adts', 'content_type': 'audio/aac',
+            'probe_name': 'aac', 'sample_rate': 44100},
+    'opus': {'encoder': 'libopus', 'container': 'ogg', 'content_type': 'audio/ogg',
+             'probe_name': 'opus', 'sample_rate': 48000},
+    'vorbis': {'encoder': 'libvorbis', 'container': 'ogg', 'content_type': 'audio/ogg',
+               'probe_name': 'vorbis', 'sample_rate': 44100},
+}
+
+# Encoder speed/quality presets: private encoder options per codec. 'fast' trades a little
+# quality for much less CPU; 'high' spends more CPU on quality. Codecs without a speed knob
+# (vorbis) ignore presets. Unset means the encoder's own default.
+ENCODER_PRESETS = {
+    'mp3': {  # libmp3lame compression_level is LAME's -q (0 best/slowest, 9 fastest)
+        'fast': {'compression_level': '7'},
+        'balanced': {'compression_level': '5'},
+        'high': {'compression_level': '2'},
+    },
+    'aac': {  # The native encoder has two coders; 'fast' also stops coding above 15 kHz
+        'fast': {'aac_coder': 'fast', 'cutoff': '15000'},
+        'balanced': {'aac_coder': 'fast'},
+        'high': {'aac_coder': 'twoloop'},
+    },
+    'opus': {  # libopus compression_level 0 (fastest) to 10 (best, default)
+        'fast': {'compression_level': '3'},
+        'balanced': {'compression_level': '6'},
+        'high': {'compression_level': '10'},
+    },
+    'vorbis': {},
+}
+PRESET_NAMES = ('fast', 'balanced', 'high')
+
+# Base of the retry backoff while a mount is busy or a preflight failed transiently
+TRANSIENT_RETRY_DELAY = 1.0
+
+# aformat channel layout names by channel count
+CHANNEL_LAYOUTS = {1: 'mono', 2: 'stereo'}
+
+# File extensions for cached encodings, by container
+CONTAINER_EXTENSIONS = {'mp3': '.mp3', 'adts': '.aac', 'ogg': '.ogg'}
 
 
 class StreamEndpoint:
@@ -39,7 +98,19 @@ class StreamEndpoint:
         self.stream_name = config.get('stream_name', 'Audio Stream')
         self.bitrate = config.get('bitrate', '128k')  # Default to 128k if not specified
         self.source_file = config.get('source_file')  # Source MP3 file for this endpoint
+        self.source = self.source_file  # source_file as configured, before it is resolved to a local path
         self.protocol = config.get('protocol', 'http').lower()  # http or https, default to http
+        self.codec = config.get('codec', 'mp3').lower()  # mp3, aac, opus or vorbis
+        codec_info = CODECS.get(self.codec, CODECS['mp3'])
+        self.container = config.get('container', codec_info['container'])  # FFmpeg muxer
+        self.content_type = config.get('content_type', codec_info['content_type'])
+        # Output sample rate and channel count; 'source' keeps the source's own (no resampling)
+        self.sample_rate = parse_audio_format_value(config.get('sample_rate', codec_info['sample_rate']),
+                                                    'sample_rate')
+        self.channels = parse_audio_format_value(config.get('channels', 2), 'channels')
+        self.preset = config.get('preset')  # Encoder preset, overrides the global encoder_preset
+        self.critical = bool(config.get('critical', False))  # Keep a warm standby process for this mount
+        self.priority = int(config.get('priority', 0))  # Higher priorities are started first
         self.process = None
         self.running = True
         
@@ -50,50 +121,1583 @@ class StreamEndpoint:
         # Validate protocol
         if self.protocol not in ['http', 'https']:
             raise ValueError(f"Protocol must be 'http' or 'https', got: {self.protocol}")
+        
+        # Validate codec
+        if self.codec not in CODECS:
+            raise ValueError(f"Codec must be one of {', '.join(CODECS)}, got: {self.codec}")
+        
+        # Validate preset
+        if self.preset is not None and self.preset not in PRESET_NAMES:
+            raise ValueError(f"Preset must be one of {', '.join(PRESET_NAMES)}, got: {self.preset}")
     
     def get_icecast_url(self):
         """Get the Icecast URL for this endpoint."""
         return f"{self.protocol}://{self.username}:{self.password}@{self.host}:{self.port}{self.mount}"
+    
+    def get_variant_key(self, default_preset: Optional[str] = None):
+        """
+        Get the encoding settings that decide which endpoints can share an encoder.
+        
+        Container and content type are not part of the key: they only affect muxing,
+        so endpoints that differ only in those still share one encoder.
+        
+        Args:
+            default_preset: Global encoder preset, used when the endpoint sets none
+        """
+        return (self.codec, self.bitrate, self.sample_rate, self.channels, self.preset or default_preset)
+    
+    def get_tee_slave(self, select: Optional[int] = None, onfail: Optional[str] = None):
+        """
+        Get the tee muxer slave specification for this endpoint.
+        
+        Slaves use FFmpeg's icecast protocol, which accepts the per-slave
+        content_type and ice_name options (the plain http protocol rejects ice_name).
+        
+        Args:
+            select: Index of the tee output stream this slave receives (all streams if None)
+            onfail: 'ignore' to let the other slaves continue when this one fails
+            
+        Returns:
+            Escaped slave string, e.g. "[f=mp3:content_type=audio/mpeg:ice_name=...]icecast://..."
+        """
+        options = [] if select is None else [('select', str(select))]
+        options += [
+            ('f', self.container),
+            ('content_type', self.content_type),
+            ('ice_name', self.stream_name),
+        ]
+        if onfail is not None:
+            options.append(('onfail', onfail))
+        if self.protocol == 'https':
+            options.append(('tls', '1'))
+        option_str = ":".join(f"{key}={tee_escape(value)}" for key, value in options)
+        url = f"icecast://{self.username}:{self.password}@{self.host}:{self.port}{self.mount}"
+        return tee_escape(f"[{option_str}]{url}", level=1)
+
+
+class StreamVariant:
+    """Represents one encoded rendition of a source, shared by one or more endpoints."""
+    
+    def __init__(self, bitrate: str, endpoints: List[StreamEndpoint], codec: str = 'mp3',
+                 sample_rate=None, channels=2, preset: Optional[str] = None):
+        """
+        Initialize a stream variant.
+        
+        Args:
+            bitrate: Audio bitrate (e.g., '128k')
+            endpoints: List of endpoints receiving this rendition
+            codec: Output codec, a key of CODECS
+            sample_rate: Output sample rate, 'source' to keep the source's (default: the codec's)
+            channels: Output channel count, or 'source' to keep the source's
+            preset: Encoder preset name (None: encoder default)
+        """
+        self.bitrate = bitrate
+        self.endpoints = endpoints
+        self.codec = codec
+        self.sample_rate = sample_rate or CODECS[codec]['sample_rate']
+        self.channels = channels
+        self.preset = preset
+        self.copy = False  # True when the source already matches and is streamed without re-encoding
+        self.cached_file = None  # Pre-encoded file from the transcode cache, streamed with copy
+    
+    def get_variant_id(self):
+        """Get an identifier for this variant, unique within its group."""
+        variant_id = self.bitrate if self.codec == 'mp3' else f"{self.codec}-{self.bitrate}"
+        if self.sample_rate != CODECS[self.codec]['sample_rate']:
+            variant_id += "-nativerate" if self.sample_rate == 'source' else f"-{self.sample_rate}"
+        if self.channels != 2:
+            variant_id += {1: "-mono", 'source': "-nativech"}.get(self.channels, f"-{self.channels}ch")
+        if self.preset:
+            variant_id += f"-{self.preset}"
+        return variant_id
+    
+    def with_endpoints(self, endpoints: List[StreamEndpoint]) -> 'StreamVariant':
+        """Get a copy of this variant (same encoding decisions) serving other endpoints."""
+        variant = copy.copy(self)
+        variant.endpoints = endpoints
+        return variant
+    
+    def get_encoder_params(self) -> Dict:
+        """Get the encoder settings of this variant (also used as part of the transcode cache key)."""
+        codec_info = CODECS[self.codec]
+        return {
+            'codec': codec_info['encoder'],
+            'bitrate': self.bitrate,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'options': ENCODER_PRESETS[self.codec].get(self.preset, {}),
+        }
+    
+    def matches_source(self, probe: Dict) -> bool:
+        """
+        Check whether a probed source can be sent as-is for this variant.
+        
+        Args:
+            probe: Result of probe_audio_file() for the source
+        """
+        return (probe.get('codec_name') == CODECS[self.codec]['probe_name']
+                and probe.get('bit_rate') == parse_bitrate(self.bitrate)
+                and self.sample_rate in ('source', probe.get('sample_rate'))
+                and self.channels in ('source', probe.get('channels')))
+    
+    def get_output_format(self) -> Tuple:
+        """Get the (sample_rate, channels) the decoded audio is converted to for this variant."""
+        return (self.sample_rate, self.channels)
 
 
 class StreamGroup:
-    """Represents a group of endpoints sharing the same source file and bitrate."""
+    """Represents a group of endpoints fed from the same source by a single process."""
     
-    def __init__(self, mp3_file: Path, bitrate: str, endpoints: List[StreamEndpoint]):
+    def __init__(self, mp3_file: Path, variants: List[StreamVariant]):
         """
         Initialize a stream group.
         
         Args:
             mp3_file: Path to the MP3 file
-            bitrate: Audio bitrate (e.g., '128k')
-            endpoints: List of endpoints in this group
+            variants: Renditions produced from this source, one encoder each
         """
         self.mp3_file = mp3_file
-        self.bitrate = bitrate
-        self.endpoints = endpoints
+        self.variants = variants
         self.process = None
         self.running = True
+        self.native = False  # True when streamed by the built-in source client instead of ffmpeg
+        self.use_pcm_bus = False  # True when encoders read decoded PCM from the source's shared bus
+        self.part = None  # Index when a source's endpoints are split across several processes
+        self.cpu_core = None  # CPU the group's process is pinned to (cpu_affinity: spread)
+        self.log_lines = collections.deque(maxlen=100)  # Last stdout/stderr lines, across restarts
+        self.stats = None  # EncoderStats of the current ffmpeg process
+        self.tasks = []  # Pipe drain and PCM feeder tasks of the current process
+        self.restarts = 0  # Number of times the group's process was restarted
+        self.stalls = 0  # Number of times the stall watchdog killed the group's process
+        self.stalled = False  # True once the watchdog has killed the current process
+        self.live_at = None  # Monotonic time the group first sent audio
+        self.preflight_error = None  # Why the last pre-spawn check kept ffmpeg from starting
+        self.preflight_transient = False  # True when that was only a busy mount
+        self.backoff = RestartBackoff()  # Restart delays and circuit breaker
+        self.leg = None  # Endpoint this group serves apart from its parent group after a failure
+        self.warm_standby = False  # True when a pre-spawned process waits to take over (critical endpoints)
+        self.standby = None  # (process, stats, tasks) of the waiting standby
+        self.standby_task = None  # Task preparing or watching the standby
+        self.standby_backoff = RestartBackoff()  # Rebuild delays of a standby that keeps dying
+        self.legs = {}  # Endpoint id to (leg group, task) for endpoints reconnecting separately
+    
+    @property
+    def endpoints(self) -> List[StreamEndpoint]:
+        """All endpoints in this group, across every variant."""
+        return [endpoint for variant in self.variants for endpoint in variant.endpoints]
+    
+    @property
+    def priority(self) -> int:
+        """Start priority of the group: the highest of its endpoints'."""
+        return max(endpoint.priority for endpoint in self.endpoints)
+    
+    def is_live(self) -> bool:
+        """Whether the group's current process has sent audio."""
+        if isinstance(self.process, NativeStreamProcess):
+            return all(pacer.media_time > 0 for pacer in self.process.pacers)
+        # Output time, not size: the tee muxer reports total_size=N/A
+        return self.stats is not None and self.stats.out_time > 0
+    
+    def get_cluster_key(self) -> str:
+        """
+        Get the key this group is placed by on the cluster hash ring.
+        
+        Built from the sources as written in the configuration, the variants and
+        the mounts, so nodes agree even when they keep the sources at different
+        paths, and same-named files in different directories do not collide.
+        """
+        sources = sorted({str(endpoint.source) for endpoint in self.endpoints})
+        mounts = sorted(f"{e.host}:{e.port}{e.mount}" for e in self.endpoints)
+        return "|".join(sources + [variant.get_variant_id() for variant in self.variants] + mounts)
     
     def get_group_id(self):
         """Get a unique identifier for this group."""
-        return f"{self.mp3_file.name}:{self.bitrate}"
+        group_id = f"{self.mp3_file.name}:{'+'.join(v.get_variant_id() for v in self.variants)}"
+        if self.part is not None:
+            group_id = f"{group_id}#{self.part}"
+        if self.leg is not None:
+            group_id = f"{group_id}@{self.leg.host}:{self.leg.port}{self.leg.mount}"
+        return group_id
+
+
+class StreamerSettings:
+    """Global streaming settings, read from the optional 'settings' section of the config."""
+    
+    FANOUT_MODES = ('tee', 'separate')
+    GROUP_BY_MODES = ('source', 'source_bitrate')
+    COPY_MODES = ('auto', 'never')
+    CPU_AFFINITY_MODES = ('none', 'spread')
+    HOST_PROBES = ('tcp', 'http', 'none')
+    PREFLIGHT_MODES = ('tcp', 'auth', 'none')
+    RESTART_POLICIES = ('always', 'on_failure', 'never')
+    
+    def __init__(self, config: Optional[Dict] = None):
+        """
+        Initialize settings from configuration dictionary.
+        
+        Args:
+            config: Dictionary with settings (missing keys use defaults)
+        """
+        config = config or {}
+        # tee: encode once per group and copy the frames to every endpoint
+        # separate: one encoder per endpoint (pre-0.0.4 behaviour)
+        self.fanout = config.get('fanout', 'tee').lower()
+        # source: one process per source file, decoding once for every bitrate
+        # source_bitrate: one process per (source file, bitrate) pair (pre-0.0.4 behaviour)
+        self.group_by = config.get('group_by', 'source').lower()
+        # auto: probe sources and stream them with -c:a copy when they already match the target
+        # never: always re-encode
+        self.copy_mode = config.get('copy_mode', 'auto').lower()
+        # Transcode each (source, variant) once into the cache and loop the result with copy
+        self.transcode_cache = bool(config.get('transcode_cache', False))
+        # Stream groups whose variants are all copy mode with the built-in source client (no ffmpeg)
+        self.native_sender = bool(config.get('native_sender', False))
+        # Built-in sender pacing: seconds of audio sent ahead of real time at startup, and how far
+        # the sender may fall behind (e.g. after a stalled write) before it re-anchors to the clock
+        self.pacing_initial_burst = float(config.get('pacing_initial_burst', 0.0))
+        self.pacing_max_lag = float(config.get('pacing_max_lag', 2.0))
+        # Split groups so no process serves more than this many endpoints (0: unlimited)
+        self.max_endpoints_per_process = int(config.get('max_endpoints_per_process', 0))
+        # Number of stdout/stderr lines kept per group for diagnostics
+        self.log_lines = int(config.get('log_lines', 100))
+        # Seconds between ffmpeg -progress reports
+        self.stats_period = float(config.get('stats_period', 5.0))
+        # none: default scheduling; spread: pin each process to the least loaded allowed core
+        self.cpu_affinity = config.get('cpu_affinity', 'none').lower()
+        # Encoder preset for endpoints that do not set their own (None: encoder default)
+        self.encoder_preset = config.get('encoder_preset')
+        # Decode a source once and fan the PCM out when several processes encode it
+        self.pcm_bus = bool(config.get('pcm_bus', False))
+        self.pcm_bus_buffer_seconds = float(config.get('pcm_bus_buffer_seconds', 5.0))
+        # always: restart a group's process whenever it exits; on_failure: only on a non-zero
+        # exit code; never: leave the group stopped
+        self.restart_policy = config.get('restart_policy', 'always').lower()
+        # Cluster sharding: each node streams the groups it owns on a consistent hash ring of
+        # cluster_members; the node id defaults to the host name (--node-id overrides it)
+        self.cluster_node_id = config.get('cluster_node_id')
+        self.cluster_members = [str(member) for member in config.get('cluster_members', [])]
+        self.cluster_virtual_nodes = int(config.get('cluster_virtual_nodes', 160))
+        # Host health gating: after a failure, probe the group's Icecast hosts (tcp: connect only;
+        # http: also expect an HTTP response; none: off). Groups whose hosts are all down wait
+        # for a probe to succeed, then are released host_release_wave at a time
+        self.host_probe = config.get('host_probe', 'tcp').lower()
+        self.host_probe_interval = float(config.get('host_probe_interval', 2.0))
+        self.host_probe_timeout = float(config.get('host_probe_timeout', 2.0))
+        self.host_release_wave = int(config.get('host_release_wave', 10))
+        self.host_release_interval = float(config.get('host_release_interval', 1.0))
+        # Pre-spawn check of each endpoint before an ffmpeg process is started
+        # (tcp: connect; auth: also complete the Icecast source handshake; none: off)
+        self.preflight = config.get('preflight', 'tcp').lower()
+        self.preflight_timeout = float(config.get('preflight_timeout', 2.0))
+        # Startup scheduling: at most startup_concurrency processes (0: unlimited) may be starting
+        # at once, each holding its slot until it sends audio or startup_timeout passes, and no
+        # more than startup_rate starts per second (0: unlimited); higher priorities go first
+        self.startup_concurrency = int(config.get('startup_concurrency', 16))
+        self.startup_rate = float(config.get('startup_rate', 0.0))
+        self.startup_timeout = float(config.get('startup_timeout', 10.0))
+        # Number of worker processes the groups are sharded across (1: supervise in this process)
+        self.workers = int(config.get('workers', 1))
+        # Seconds every process gets to exit after SIGTERM on shutdown before all are killed at once
+        self.shutdown_timeout = float(config.get('shutdown_timeout', 5.0))
+        # Kill and restart a process whose output has not advanced for this many seconds (0: off)
+        self.stall_timeout = float(config.get('stall_timeout', 30.0))
+        # Keep a group's other endpoints streaming when one of them fails, and reconnect
+        # the failed endpoint separately
+        self.endpoint_isolation = bool(config.get('endpoint_isolation', True))
+        # Restart backoff: the delay before the n-th consecutive restart is drawn uniformly from
+        # [0, min(restart_max_delay, restart_delay * 2^(n-1))] (full jitter). A process that ran
+        # for restart_stable_after seconds resets the sequence; circuit_breaker_failures
+        # consecutive shorter runs park the group for circuit_breaker_cooldown seconds (0: never)
+        self.restart_delay = float(config.get('restart_delay', 1.0))
+        self.restart_max_delay = float(config.get('restart_max_delay', 60.0))
+        self.restart_stable_after = float(config.get('restart_stable_after', 30.0))
+        self.circuit_breaker_failures = int(config.get('circuit_breaker_failures', 10))
+        self.circuit_breaker_cooldown = float(config.get('circuit_breaker_cooldown', 300.0))
+        
+        if self.fanout not in self.FANOUT_MODES:
+            raise ValueError(f"fanout must be one of {', '.join(self.FANOUT_MODES)}, got: {self.fanout}")
+        if self.group_by not in self.GROUP_BY_MODES:
+            raise ValueError(f"group_by must be one of {', '.join(self.GROUP_BY_MODES)}, got: {self.group_by}")
+        if self.copy_mode not in self.COPY_MODES:
+            raise ValueError(f"copy_mode must be one of {', '.join(self.COPY_MODES)}, got: {self.copy_mode}")
+        if self.pacing_initial_burst < 0 or self.pacing_max_lag <= 0:
+            raise ValueError("pacing_initial_burst must be >= 0 and pacing_max_lag must be > 0")
+        if self.max_endpoints_per_process < 0:
+            raise ValueError("max_endpoints_per_process must be >= 0")
+        if self.log_lines < 1:
+            raise ValueError("log_lines must be >= 1")
+        if self.stats_period <= 0:
+            raise ValueError("stats_period must be > 0")
+        if self.cpu_affinity not in self.CPU_AFFINITY_MODES:
+            raise ValueError(f"cpu_affinity must be one of {', '.join(self.CPU_AFFINITY_MODES)}, got: {self.cpu_affinity}")
+        if self.encoder_preset is not None and self.encoder_preset not in PRESET_NAMES:
+            raise ValueError(f"encoder_preset must be one of {', '.join(PRESET_NAMES)}, got: {self.encoder_preset}")
+        if self.pcm_bus_buffer_seconds <= 0:
+            raise ValueError("pcm_bus_buffer_seconds must be > 0")
+        if len(set(self.cluster_members)) != len(self.cluster_members):
+            raise ValueError("cluster_members must not contain duplicates")
+        if self.cluster_virtual_nodes < 1:
+            raise ValueError("cluster_virtual_nodes must be >= 1")
+        if self.host_probe not in self.HOST_PROBES:
+            raise ValueError(f"host_probe must be one of {', '.join(self.HOST_PROBES)}, got: {self.host_probe}")
+        if self.host_probe_interval <= 0 or self.host_probe_timeout <= 0 or self.host_release_interval < 0:
+            raise ValueError("host_probe_interval and host_probe_timeout must be > 0 and host_release_interval >= 0")
+        if self.host_release_wave < 1:
+            raise ValueError("host_release_wave must be >= 1")
+        if self.preflight not in self.PREFLIGHT_MODES:
+            raise ValueError(f"preflight must be one of {', '.join(self.PREFLIGHT_MODES)}, got: {self.preflight}")
+        if self.preflight_timeout <= 0:
+            raise ValueError(f"preflight_timeout must be > 0, got: {self.preflight_timeout}")
+        if self.startup_concurrency < 0 or self.startup_rate < 0 or self.startup_timeout <= 0:
+            raise ValueError("startup_concurrency and startup_rate must be >= 0 and startup_timeout must be > 0")
+        if self.workers < 1:
+            raise ValueError("workers must be >= 1")
+        if self.shutdown_timeout < 0:
+            raise ValueError(f"shutdown_timeout must be >= 0, got: {self.shutdown_timeout}")
+        if self.stall_timeout < 0 or 0 < self.stall_timeout <= self.stats_period:
+            raise ValueError("stall_timeout must be 0 (off) or greater than stats_period")
+        if self.restart_policy not in self.RESTART_POLICIES:
+            raise ValueError(f"restart_policy must be one of {', '.join(self.RESTART_POLICIES)}, got: {self.restart_policy}")
+        if self.restart_delay < 0 or self.restart_max_delay < self.restart_delay:
+            raise ValueError("restart_delay must be >= 0 and restart_max_delay must be >= restart_delay")
+        if self.restart_stable_after < 0:
+            raise ValueError("restart_stable_after must be >= 0")
+        if self.circuit_breaker_failures < 0 or self.circuit_breaker_cooldown <= 0:
+            raise ValueError("circuit_breaker_failures must be >= 0 and circuit_breaker_cooldown must be > 0")
+
+
+class TranscodeCache:
+    """
+    Persistent cache of sources pre-encoded for a variant.
+    
+    Entries are keyed on the SHA-256 of the source content plus the encoder
+    settings and recorded in an index file next to the cached files. Source
+    hashes are reused while a file's mtime and size are unchanged; when they
+    change the file is hashed again and entries built from the old content
+    are removed.
+    """
+    
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Initialize the transcode cache.
+        
+        Args:
+            cache_dir: Directory for cached files and the index (default: <cache>/transcodes)
+        """
+        self.cache_dir = cache_dir or get_cache_dir() / 'transcodes'
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / 'index.json'
+        self.index = self._load_index()
+    
+    def _load_index(self) -> Dict:
+        """Load the index, starting empty if it is missing or unreadable."""
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if isinstance(index.get('sources'), dict) and isinstance(index.get('entries'), dict):
+                return index
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {'sources': {}, 'entries': {}}
+    
+    def _save_index(self):
+        """Write the index atomically."""
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+    
+    def _get_source_hash(self, source_path: Path) -> str:
+        """Get the content hash of a source file, rehashing only when its mtime or size changed."""
+        key = str(source_path.absolute())
+        stat = source_path.stat()
+        record = self.index['sources'].get(key)
+        if record and record['mtime'] == stat.st_mtime and record['size'] == stat.st_size:
+            return record['sha256']
+        
+        sha256 = hashlib.sha256()
+        with open(source_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+        
+        if record and record['sha256'] != digest:
+            self._invalidate_source(key, record['sha256'])
+        self.index['sources'][key] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': digest}
+        return digest
+    
+    def _invalidate_source(self, source_key: str, old_hash: str):
+        """Remove every entry that was built from an old version of a source."""
+        for entry_key, entry in list(self.index['entries'].items()):
+            if entry['sources'].get(source_key) == old_hash:
+                (self.cache_dir / entry['file']).unlink(missing_ok=True)
+                del self.index['entries'][entry_key]
+                print(f"Transcode cache: invalidated {entry['file']} ({source_key} changed)")
+    
+    def get(self, source_path: Path, variant: StreamVariant) -> Optional[Path]:
+        """
+        Get the cached encoding of a source for a variant, transcoding it on a miss.
+        
+        Args:
+            source_path: Source file or directory playlist
+            variant: Variant whose encoder settings are applied
+            
+        Returns:
+            Path to the cached file, or None if transcoding failed
+        """
+        is_playlist = source_path.name.endswith('.audio-push-playlist.txt')
+        files = read_playlist_file(source_path) if is_playlist else [source_path]
+        source_hashes = {str(path.absolute()): self._get_source_hash(path) for path in files}
+        params = variant.get_encoder_params()
+        container = CODECS[variant.codec]['container']
+        
+        key_material = json.dumps({'sources': [source_hashes[str(path.absolute())] for path in files],
+                                   'params': params}, sort_keys=True)
+        key = hashlib.sha256(key_material.encode()).hexdigest()
+        entry = self.index['entries'].get(key)
+        if entry and (self.cache_dir / entry['file']).exists():
+            self._save_index()
+            return self.cache_dir / entry['file']
+        
+        cached_file = self.cache_dir / f"{key}{CONTAINER_EXTENSIONS.get(container, '.' + container)}"
+        if not self._transcode(source_path, is_playlist, params, container, cached_file):
+            self._save_index()
+            return None
+        self.index['entries'][key] = {
+            'file': cached_file.name,
+            'sources': source_hashes,
+            'params': params,
+            'created': time.time(),
+        }
+        self._save_index()
+        return cached_file
+    
+    def _transcode(self, source_path: Path, is_playlist: bool, params: Dict, container: str,
+                   cached_file: Path) -> bool:
+        """Encode a source into the cache, writing to a temporary file first."""
+        tmp_file = cached_file.with_suffix('.tmp' + cached_file.suffix)
+        input_args = ['-f', 'concat', '-safe', '0'] if is_playlist else []
+        # No tags or Xing header, so MP3 files loop cleanly with stream copy
+        container_args = ['-id3v2_version', '0', '-write_xing', '0'] if container == 'mp3' else []
+        preset_args = [arg for option, value in params['options'].items() for arg in (f'-{option}', value)]
+        format_args = []
+        if params['sample_rate'] != 'source':
+            format_args += ['-ar', str(params['sample_rate'])]
+        if params['channels'] != 'source':
+            format_args += ['-ac', str(params['channels'])]
+        ffmpeg_cmd = ['ffmpeg', '-y', '-v', 'error'] + input_args + [
+            '-i', str(source_path),
+            '-map', '0:a:0',
+            '-map_metadata', '-1',
+            '-c:a', params['codec'],
+            '-b:a', params['bitrate'],
+        ] + format_args + preset_args + container_args + [
+            '-f', container,
+            str(tmp_file)
+        ]
+        print(f"Transcode cache: encoding {source_path.name} with {params['codec']} at {params['bitrate']}...")
+        try:
+            subprocess.run(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                           universal_newlines=True, check=True)
+            os.replace(tmp_file, cached_file)
+            return True
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"Transcode cache: failed to encode {source_path.name}, encoding live instead: {e}",
+                  file=sys.stderr)
+            tmp_file.unlink(missing_ok=True)
+            return False
+
+
+class IcecastAuthError(ConnectionError):
+    """Raised when an Icecast server rejects the source credentials (HTTP 401)."""
+
+
+class IcecastMountInUseError(ConnectionError):
+    """Raised when another source holds the mount (HTTP 403); usually transient."""
+
+
+class IcecastSourceClient:
+    """
+    Minimal Icecast source client that sends pre-encoded audio over a connection.
+    
+    Runs on the asyncio event loop, so one thread can feed any number of mounts.
+    send() never waits: data is queued on the connection, and while max_buffer
+    bytes are already queued (the server or the network is not keeping up) new
+    data is dropped, so one slow endpoint cannot hold up the others. A connection
+    that stays backed up for timeout seconds counts as failed.
+    """
+    
+    def __init__(self, endpoint: StreamEndpoint, content_type: Optional[str] = None, timeout: float = 10.0,
+                 max_buffer: Optional[int] = None):
+        """
+        Initialize the source client.
+        
+        Args:
+            endpoint: Endpoint to connect to
+            content_type: Content type of the audio being sent (default: the endpoint's)
+            timeout: Seconds allowed for the handshake, and for the connection to stay backed up
+            max_buffer: Bytes that may be queued before audio is dropped (default: two seconds
+                at the endpoint's bitrate)
+        """
+        self.endpoint = endpoint
+        self.content_type = content_type or endpoint.content_type
+        self.timeout = timeout
+        self.max_buffer = max_buffer or 2 * (parse_bitrate(endpoint.bitrate) or 128000) // 8
+        self.dropped = 0  # Bytes dropped because the connection was backed up
+        self.backed_up_since = None  # Monotonic time the connection last started backing up
+        self.reader = None
+        self.writer = None
+    
+    async def connect(self):
+        """
+        Connect and perform the source handshake.
+        
+        Tries the HTTP PUT method (Icecast 2.4+) first and falls back to the
+        legacy SOURCE method if the server does not accept PUT.
+        """
+        status, message = await self._handshake('PUT', 'HTTP/1.1')
+        if status in (400, 405, 501):
+            self.abort()
+            status, message = await self._handshake('SOURCE', 'ICE/1.0')
+        if status in (100, 200):
+            return
+        self.abort()
+        detail = f" {message}" if message else ""
+        if status == 401:
+            raise IcecastAuthError(f"Authentication failed (HTTP 401{detail})")
+        # Icecast answers 403 both for a busy mount and for refusals such as an unsupported content type
+        if status == 403 and 'in use' in message.lower():
+            raise IcecastMountInUseError(f"Mount in use (HTTP 403{detail})")
+        raise ConnectionError(f"Source handshake failed (HTTP {status}{detail})")
+    
+    async def _handshake(self, method: str, version: str) -> Tuple[int, str]:
+        """
+        Open a connection, send the request headers and read the response.
+        
+        Returns:
+            (status code, reason phrase plus the text of an error body)
+        """
+        endpoint = self.endpoint
+        context = ssl.create_default_context() if endpoint.protocol == 'https' else None
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(endpoint.host, int(endpoint.port), ssl=context), self.timeout)
+            
+            credentials = base64.b64encode(f"{endpoint.username}:{endpoint.password}".encode()).decode()
+            headers = [
+                f"{method} {endpoint.mount} {version}",
+                f"Host: {endpoint.host}:{endpoint.port}",
+                f"Authorization: Basic {credentials}",
+                f"User-Agent: audio-push/{__version__}",
+                f"Content-Type: {self.content_type}",
+                f"Ice-Name: {endpoint.stream_name}",
+                "Ice-Public: 0",
+                f"Ice-Audio-Info: bitrate={(parse_bitrate(endpoint.bitrate) or 0) // 1000}",
+            ]
+            if method == 'PUT':
+                headers.append("Expect: 100-continue")
+            self.writer.write(("\r\n".join(headers) + "\r\n\r\n").encode())
+            return await asyncio.wait_for(self._read_response(), self.timeout)
+        except asyncio.TimeoutError:
+            self.abort()
+            raise ConnectionError(f"Source handshake timed out after {self.timeout:g} seconds")
+    
+    async def _read_response(self) -> Tuple[int, str]:
+        """Read the response head, and the body of an error response."""
+        response = b''
+        while b'\r\n\r\n' not in response and b'\n\n' not in response:
+            chunk = await self.reader.read(4096)
+            if not chunk:
+                break
+            response += chunk
+            if len(response) > 65536:
+                break
+        head, _, body = response.replace(b'\r\n', b'\n').partition(b'\n\n')
+        status_line = head.split(b'\n', 1)[0].decode('latin-1').split(None, 2)
+        try:
+            status = int(status_line[1])
+        except (IndexError, ValueError):
+            return 0, ""
+        if status >= 400:
+            # Icecast explains errors in the body (e.g. "Mountpoint in use") and then closes
+            try:
+                while len(body) < 4096:
+                    chunk = await self.reader.read(4096)
+                    if not chunk:
+                        break
+                    body += chunk
+            except OSError:
+                pass
+        reason = status_line[2] if len(status_line) > 2 else ""
+        text = re.sub(r'<[^>]*>', ' ', body[:4096].decode('utf-8', 'replace'))
+        return status, " ".join(f"{reason} {text}".split())
+    
+    def send(self, data: bytes) -> bool:
+        """
+        Queue audio data for the server without waiting.
+        
+        Returns:
+            False if the data was dropped because the connection is backed up
+        
+        Raises:
+            ConnectionError: The connection has closed, or stayed backed up for timeout seconds
+        """
+        if self.writer is None or self.writer.is_closing() or self.reader.at_eof():
+            raise ConnectionError("Connection closed by the server")
+        if self.writer.transport.get_write_buffer_size() >= self.max_buffer:
+            now = time.monotonic()
+            if self.backed_up_since is None:
+                self.backed_up_since = now
+            elif now - self.backed_up_since >= self.timeout:
+                raise ConnectionError(f"Server has not taken any audio for {self.timeout:g} seconds")
+            self.dropped += len(data)
+            return False
+        self.backed_up_since = None
+        self.writer.write(data)
+        return True
+    
+    def is_backed_up(self) -> bool:
+        """Check whether audio is still queued because the server is not taking it."""
+        if self.writer is None:
+            return False
+        return self.backed_up_since is not None or self.writer.transport.get_write_buffer_size() > 0
+    
+    def close(self):
+        """
+        Close a healthy connection cleanly.
+        
+        The socket is only closed once the queued audio has been sent, so use
+        abort() for a connection that failed or is backed up.
+        """
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+    
+    def abort(self):
+        """
+        Drop the connection at once, discarding queued audio.
+        
+        The connection is reset rather than closed, so a server that stopped
+        reading learns of it immediately and releases the mount instead of
+        waiting for the data and FIN queued behind it in the socket.
+        """
+        if self.writer:
+            sock = self.writer.transport.get_extra_info('socket')
+            if sock is not None:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                except OSError:
+                    pass
+            self.writer.transport.abort()
+            self.writer = None
+
+
+class RealtimePacer:
+    """
+    Keeps a stream of timed media locked to the wall clock.
+    
+    Each unit of media is due at anchor + media time sent so far, so sleep
+    overshoot and the varying durations of looped files and track changes never
+    accumulate into drift. If sending falls more than max_lag behind (a stalled
+    write, a suspended host) the pacer re-anchors instead of bursting to catch up.
+    """
+    
+    def __init__(self, initial_burst: float = 0.0, max_lag: float = 2.0):
+        """
+        Initialize the pacer.
+        
+        Args:
+            initial_burst: Seconds of media that may be sent ahead of real time at the start
+            max_lag: Seconds behind real time after which the schedule is re-anchored
+        """
+        self.initial_burst = initial_burst
+        self.max_lag = max_lag
+        self.anchor = time.monotonic()
+        self.media_time = 0.0
+        self.resyncs = 0
+        self.advanced_at = self.anchor  # Monotonic time media was last sent
+    
+    def start(self):
+        """(Re)start the schedule from now."""
+        self.anchor = time.monotonic()
+        self.media_time = 0.0
+        self.advanced_at = self.anchor
+    
+    def delay(self) -> float:
+        """
+        Get how long to wait before the next unit of media is due.
+        
+        Returns:
+            Seconds to wait (0 if the media is already due)
+        """
+        now = time.monotonic()
+        due = self.anchor + self.media_time - self.initial_burst
+        if self.media_time >= self.initial_burst and now - due > self.max_lag:
+            # Too far behind: drop the backlog rather than flood the server
+            self.anchor = now - self.media_time + self.initial_burst
+            self.resyncs += 1
+            return 0.0
+        return max(0.0, due - now)
+    
+    def advance(self, duration: float):
+        """Record that a unit of media of the given duration has been sent."""
+        self.media_time += duration
+        self.advanced_at = time.monotonic()
+    
+    def get_offset(self) -> float:
+        """
+        Get the current lead (positive) or lag (negative) against the wall clock.
+        
+        Returns:
+            Seconds of media sent ahead of (or behind) real time, excluding the initial burst
+        """
+        return self.media_time - (time.monotonic() - self.anchor) - self.initial_burst
+
+
+class ConsistentHashRing:
+    """
+    Assigns keys to cluster members with consistent hashing.
+    
+    Every member is placed on a 64-bit ring at virtual_nodes pseudo-random
+    points; a key belongs to the first member point at or after its own hash.
+    Adding or removing one of N members therefore moves only about 1/N of the
+    keys, and every node computes the same assignment from the member list
+    alone, without talking to the others.
+    """
+    
+    def __init__(self, members: List[str], virtual_nodes: int = 160):
+        """
+        Build the ring.
+        
+        Args:
+            members: Node ids of all cluster members
+            virtual_nodes: Points per member; more points spread keys more evenly
+        """
+        points = sorted((self._hash(f"{member}#{index}"), member)
+                        for member in members for index in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._members = [member for _, member in points]
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        """Hash a key to a point on the ring."""
+        return int.from_bytes(hashlib.sha256(key.encode('utf-8')).digest()[:8], 'big')
+    
+    def get_member(self, key: str) -> str:
+        """Get the member that owns a key."""
+        index = bisect.bisect_left(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._members[index]
+
+
+class HostHealth:
+    """
+    Health of one Icecast host, shared by every group that streams to it.
+    
+    A host is marked down when a probe fails after a group's process exits.
+    Groups that have no healthy host left wait on it; once a probe succeeds
+    they are released in waves instead of all reconnecting at once.
+    """
+    
+    def __init__(self, host: str, port: int, protocol: str = 'http'):
+        """
+        Initialize the host state.
+        
+        Args:
+            host: Icecast hostname or IP address
+            port: Icecast port
+            protocol: 'http' or 'https'
+        """
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.down = False
+        self.down_since = None
+        self.failed_probes = 0  # Failed probes during the current outage
+        self.outages = 0
+        self.probe_task = None  # Probe in flight, shared by concurrent checks
+        self.monitor_task = None  # Task probing the host while it is down
+        self._waiters = collections.deque()  # Futures of groups waiting for the host
+    
+    def wait_for_release(self) -> asyncio.Future:
+        """Get a future that completes when this host releases the caller."""
+        future = asyncio.get_running_loop().create_future()
+        if self.down:
+            self._waiters.append(future)
+        else:
+            future.set_result(None)
+        return future
+    
+    def release(self, count: int) -> int:
+        """
+        Release up to count waiting groups.
+        
+        Returns:
+            Number of groups still waiting
+        """
+        while count and self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():  # Skip groups that stopped waiting
+                future.set_result(None)
+                count -= 1
+        return len(self._waiters)
+    
+    def as_dict(self) -> Dict:
+        """Get the host state as a dictionary."""
+        return {
+            'down': self.down,
+            'down_for': time.monotonic() - self.down_since if self.down else None,
+            'failed_probes': self.failed_probes,
+            'outages': self.outages,
+            'waiting': sum(1 for future in self._waiters if not future.done()),
+        }
+
+
+class StartupScheduler:
+    """
+    Limits how many processes start at once and how fast starts ramp up.
+    
+    Waiters are served in the order they ask, so callers that ask in priority
+    order start in priority order.
+    """
+    
+    def __init__(self, concurrency: int = 0, rate: float = 0.0):
+        """
+        Initialize the scheduler. Must be created on the event loop that uses it.
+        
+        Args:
+            concurrency: Maximum number of starts in progress (0: unlimited)
+            rate: Maximum starts per second (0: unlimited)
+        """
+        self._slots = asyncio.Semaphore(concurrency) if concurrency else None
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next_start = 0.0
+        self.in_progress = 0
+    
+    async def acquire(self):
+        """Wait for a start slot."""
+        if self._slots is not None:
+            await self._slots.acquire()
+        self.in_progress += 1
+        if self._interval:
+            # Reserve the next free start time before sleeping, so waiters keep their order
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self._interval
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+    
+    def release(self):
+        """Give a start slot back."""
+        self.in_progress -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+
+class RestartBackoff:
+    """
+    Restart delays of one group: exponential backoff with full jitter and a circuit breaker.
+    
+    A run shorter than stable_after counts as a fast failure. The delay after the
+    n-th consecutive fast failure is drawn uniformly from
+    [0, min(max_delay, base_delay * 2^(n-1))], so groups failing together do not
+    retry together. After breaker_failures consecutive fast failures the circuit
+    opens and the group is parked for breaker_cooldown seconds; one more fast
+    failure after that parks it again, a stable run closes the circuit.
+    """
+    
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, stable_after: float = 30.0,
+                 breaker_failures: int = 10, breaker_cooldown: float = 300.0):
+        """
+        Initialize the backoff.
+        
+        Args:
+            base_delay: Upper bound of the first delay in seconds
+            max_delay: Upper bound of any delay in seconds
+            stable_after: Seconds a process must run to reset the failure count
+            breaker_failures: Consecutive fast failures that open the circuit (0: never)
+            breaker_cooldown: Seconds a group stays parked once the circuit is open
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stable_after = stable_after
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.failures = 0  # Consecutive fast failures
+        self.circuit_open = False
+        self.started_at = None
+        self.last_runtime = None
+        self.last_delay = None
+        self.retry_at = None  # Monotonic time of the next start attempt
+    
+    def record_start(self):
+        """Record a start attempt."""
+        self.started_at = time.monotonic()
+        self.retry_at = None
+    
+    def record_exit(self, min_base_delay: float = 0.0) -> float:
+        """
+        Record that the process ended (or failed to start) and pick the delay before the next attempt.
+        
+        Args:
+            min_base_delay: Floor for base_delay for this failure, so a retry that must
+                not spin keeps backing off even with a base_delay of 0
+        
+        Returns:
+            Seconds to wait before restarting
+        """
+        now = time.monotonic()
+        self.last_runtime = now - self.started_at if self.started_at is not None else 0.0
+        if self.last_runtime >= self.stable_after:
+            self.failures = 0
+            self.circuit_open = False
+        self.failures += 1
+        if self.breaker_failures and self.failures >= self.breaker_failures:
+            self.circuit_open = True
+            delay = self.breaker_cooldown
+        else:
+            # Exponent capped so the bound stays a float long after it exceeds max_delay
+            base_delay = max(self.base_delay, min_base_delay)
+            bound = min(max(self.max_delay, base_delay), base_delay * 2 ** min(self.failures - 1, 32))
+            delay = random.uniform(0, bound)
+        self.last_delay = delay
+        self.retry_at = now + delay
+        return delay
+    
+    def reset(self):
+        """Forget past failures and close the circuit."""
+        self.failures = 0
+        self.circuit_open = False
+    
+    def as_dict(self) -> Dict:
+        """Get the backoff state as a dictionary."""
+        return {
+            'failures': self.failures,
+            'circuit_open': self.circuit_open,
+            'last_runtime': self.last_runtime,
+            'last_delay': self.last_delay,
+            'retry_in': None if self.retry_at is None else max(0.0, self.retry_at - time.monotonic()),
+        }
+
+
+class NativeStreamProcess:
+    """
+    Process-like handle for a group streamed by the built-in source client.
+    
+    Each variant is a task on the supervisor's event loop: MP3 frames are read
+    from the variant's input files, paced to real time and queued on every
+    endpoint's connection without waiting, so all built-in sender groups share
+    the supervisor's thread and a backed-up endpoint only loses its own audio.
+    Exposes the subset of the asyncio.subprocess.Process interface used by
+    AudioStreamer (returncode, terminate, kill, wait). Must be created on the
+    running event loop.
+    """
+    
+    def __init__(self, variant_inputs: List[Tuple[List[Path], List[StreamEndpoint]]],
+                 initial_burst: float = 0.0, max_lag: float = 2.0, isolate_endpoints: bool = False,
+                 log: Optional[collections.deque] = None):
+        """
+        Start streaming.
+        
+        Args:
+            variant_inputs: For each variant, the files to loop and the endpoints to send to
+            initial_burst: Seconds of audio sent ahead of real time at startup
+            max_lag: Seconds behind real time after which pacing re-anchors
+            isolate_endpoints: Keep sending to a variant's other endpoints when one fails
+                and reconnect it in the background (the variant fails once all have failed)
+            log: Optional deque receiving endpoint failure messages
+        """
+        self.pid = None
+        self.isolate_endpoints = isolate_endpoints
+        self.log = log if log is not None else collections.deque(maxlen=100)
+        self.returncode = None
+        self.error = None
+        self.pacers = [RealtimePacer(initial_burst, max_lag) for _ in variant_inputs]
+        self._exited = asyncio.Event()
+        self._reconnects = set()  # Background reconnect tasks
+        self._tasks = [
+            asyncio.ensure_future(self._run_variant(files, endpoints, pacer))
+            for (files, endpoints), pacer in zip(variant_inputs, self.pacers)
+        ]
+        self._active = len(self._tasks)
+        for task in self._tasks:
+            task.add_done_callback(self._variant_done)
+    
+    async def _run_variant(self, files: List[Path], endpoints: List[StreamEndpoint], pacer: RealtimePacer):
+        """Send one variant's frames to its endpoints until stopped or a connection fails."""
+        clients = []
+        try:
+            results = await asyncio.gather(*(self._connect(e) for e in endpoints), return_exceptions=True)
+            clients.extend(result for result in results if isinstance(result, IcecastSourceClient))
+            for endpoint, result in zip(endpoints, results):
+                if isinstance(result, Exception):
+                    if not self.isolate_endpoints or len(endpoints) == 1:
+                        raise result
+                    self._reconnect_later(endpoint, clients, result)
+            
+            # The pacer starts when the connections are up, so the handshake does not count as lag
+            pacer.start()
+            while True:
+                sent = False
+                for file_path in files:
+                    for frame, duration in iter_mp3_frames(file_path):
+                        # Sleeps even when the frame is due, so a burst never starves other groups
+                        await asyncio.sleep(pacer.delay())
+                        if not clients:
+                            raise ConnectionError("All endpoints failed")
+                        for client in list(clients):
+                            was_backed_up = client.backed_up_since is not None
+                            try:
+                                if not client.send(frame) and not was_backed_up:
+                                    self.log.append(f"Endpoint {self._get_endpoint_id(client.endpoint)} "
+                                                    f"is not keeping up; dropping audio until it does")
+                            except ConnectionError as e:
+                                if not self.isolate_endpoints:
+                                    raise
+                                clients.remove(client)
+                                client.abort()
+                                self._reconnect_later(client.endpoint, clients, e)
+                        pacer.advance(duration)
+                        sent = True
+                if not sent:
+                    raise ValueError("No MP3 frames found in the input")
+        except asyncio.CancelledError:
+            pass  # Stopped by terminate()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+            self.terminate()
+        finally:
+            for client in clients:
+                # A connection the server stopped reading from would never finish closing
+                if client.is_backed_up():
+                    client.abort()
+                else:
+                    client.close()
+            clients.clear()
+    
+    def _variant_done(self, task: asyncio.Task):
+        """Set the exit code once a variant fails or all variants have ended."""
+        self._active -= 1
+        if self.returncode is None and (self.error is not None or self._active == 0):
+            self.returncode = 1 if self.error is not None else 0
+            self._exited.set()
+    
+    @staticmethod
+    async def _connect(endpoint: StreamEndpoint) -> IcecastSourceClient:
+        """Open a source connection to an endpoint."""
+        client = IcecastSourceClient(endpoint)
+        await client.connect()
+        return client
+    
+    @staticmethod
+    def _get_endpoint_id(endpoint: StreamEndpoint) -> str:
+        """Get a short identifier of an endpoint for log messages."""
+        return f"{endpoint.host}:{endpoint.port}{endpoint.mount}"
+    
+    def _reconnect_later(self, endpoint: StreamEndpoint, clients: List[IcecastSourceClient], error: Exception):
+        """Reconnect a failed endpoint in the background and add it back to the variant's clients."""
+        self.log.append(f"Endpoint {self._get_endpoint_id(endpoint)} failed ({error}); "
+                        f"reconnecting in the background")
+        task = asyncio.ensure_future(self._reconnect(endpoint, clients))
+        self._reconnects.add(task)
+        task.add_done_callback(self._reconnects.discard)
+    
+    async def _reconnect(self, endpoint: StreamEndpoint, clients: List[IcecastSourceClient]):
+        """Retry an endpoint with jittered exponential backoff until it accepts the source again."""
+        delay = 1.0
+        while True:
+            await asyncio.sleep(random.uniform(0, delay))
+            try:
+                client = await self._connect(endpoint)
+            except OSError as e:
+                # A busy mount is usually our own dropped connection not yet noticed by the server
+                delay = 1.0 if isinstance(e, IcecastMountInUseError) else min(delay * 2, 60.0)
+                continue
+            if self.returncode is not None:
+                client.close()
+            else:
+                clients.append(client)
+                self.log.append(f"Endpoint {self._get_endpoint_id(endpoint)} reconnected")
+            return
+    
+    def get_pacing_offsets(self) -> List[float]:
+        """Get each variant's lead (positive) or lag (negative) against real time, in seconds."""
+        return [pacer.get_offset() for pacer in self.pacers]
+    
+    def get_pacing_resyncs(self) -> int:
+        """Get how many times the variants' pacers have re-anchored after falling behind."""
+        return sum(pacer.resyncs for pacer in self.pacers)
+    
+    def get_last_progress(self) -> float:
+        """Get the monotonic time at which the slowest variant last sent audio."""
+        return min(pacer.advanced_at for pacer in self.pacers)
+    
+    def terminate(self):
+        """Stop all variants and background reconnects."""
+        for task in self._tasks + list(self._reconnects):
+            task.cancel()
+    
+    def kill(self):
+        """Same as terminate(); variants stop at once."""
+        self.terminate()
+    
+    async def wait(self) -> int:
+        """Wait until streaming has ended and return the exit code."""
+        await self._exited.wait()
+        return self.returncode
+
+
+class PcmFanoutBuffer:
+    """
+    Single-writer buffer of the most recent PCM chunks, read by several feeders.
+    
+    Chunks are kept as the objects the writer published, so fanning them out to
+    any number of readers shares them instead of copying them into a ring. Each
+    reader keeps its own position (total bytes consumed); a reader that falls
+    more than capacity bytes behind skips ahead.
+    """
+    
+    def __init__(self, capacity: int):
+        """
+        Initialize the buffer.
+        
+        Args:
+            capacity: Bytes of recent PCM kept for readers that fall behind
+        """
+        self.capacity = capacity
+        self.write_pos = 0  # Total number of bytes written
+        self._chunks = collections.deque()  # (position of the first byte, chunk)
+        self._size = 0
+    
+    def write(self, data: bytes):
+        """Append a chunk of PCM, dropping the oldest chunks beyond capacity."""
+        if not data:
+            return
+        self._chunks.append((self.write_pos, data))
+        self.write_pos += len(data)
+        self._size += len(data)
+        while self._size - len(self._chunks[0][1]) >= self.capacity:
+            self._size -= len(self._chunks.popleft()[1])
+    
+    def read(self, read_pos: int) -> Tuple[bytes, int, int]:
+        """
+        Read everything written since a position.
+        
+        Args:
+            read_pos: Reader's position (total bytes consumed so far)
+            
+        Returns:
+            (data, new read position, bytes skipped because the reader fell behind)
+        """
+        if read_pos >= self.write_pos:
+            return b'', read_pos, 0
+        skipped = max(0, self._chunks[0][0] - read_pos)
+        read_pos += skipped
+        parts = []
+        for start, chunk in reversed(self._chunks):
+            if start + len(chunk) <= read_pos:
+                break
+            parts.append(chunk if start >= read_pos else chunk[read_pos - start:])
+        parts.reverse()
+        # A reader that keeps up gets the published chunk itself, without a copy
+        data = parts[0] if len(parts) == 1 else b''.join(parts)
+        return data, self.write_pos, skipped
+
+
+class PcmDecodeBus:
+    """
+    Decodes one source once for several encoder processes.
+    
+    A single paced ffmpeg decoder writes signed 16-bit PCM to its stdout; a pump
+    task on the supervisor's event loop passes each chunk through the registered
+    taps (gain, mixing, metering) into a PcmFanoutBuffer. Encoder processes read
+    the PCM on stdin from a feeder task running feed(). Everything stays in the
+    supervisor process; the encoders only ever see their stdin pipe.
+    """
+    
+    def __init__(self, source_file: Path, sample_rate: int = 44100, channels: int = 2,
+                 buffer_seconds: float = 5.0):
+        """
+        Initialize the bus.
+        
+        Args:
+            source_file: Source file or directory playlist to decode
+            sample_rate: PCM sample rate
+            channels: PCM channel count
+            buffer_seconds: Seconds of audio kept for encoders that fall behind
+        """
+        self.source_file = source_file
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_size = 2 * channels  # s16le
+        capacity = int(buffer_seconds * sample_rate) * self.frame_size
+        self.buffer = PcmFanoutBuffer(capacity)
+        self.taps = []
+        self.process = None
+        self.running = False
+        self.cpu_core = None  # CPU the decoder is pinned to, if any
+        self._readers = set()  # One event per feeder, set when new PCM is published
+        self._task = None
+    
+    def add_tap(self, tap: Callable[[bytes], Optional[bytes]]):
+        """
+        Register a callable that sees every decoded PCM chunk before it is published.
+        
+        Args:
+            tap: Called with each chunk; may return replacement PCM of the same length, or None
+        """
+        self.taps.append(tap)
+    
+    def get_input_args(self) -> List[str]:
+        """Get the ffmpeg input arguments for an encoder reading this bus on stdin."""
+        return [
+            '-f', 's16le',  # Raw PCM
+            '-ar', str(self.sample_rate),
+            '-ac', str(self.channels),
+            '-i', 'pipe:0',  # Fed from the bus
+        ]
+    
+    def build_decoder_command(self) -> List[str]:
+        """Build the ffmpeg command of the decoder."""
+        input_args = ['-re']
+        if self.source_file.name.endswith('.audio-push-playlist.txt'):
+            input_args += ['-f', 'concat', '-safe', '0']
+        return ['ffmpeg', '-v', 'error'] + input_args + [
+            '-stream_loop', '-1',
+            '-i', str(self.source_file),
+            '-map', '0:a:0',
+            '-f', 's16le',
+            '-ar', str(self.sample_rate),
+            '-ac', str(self.channels),
+            'pipe:1'
+        ]
+    
+    def start(self):
+        """Start the decoder and the pump task on the running event loop."""
+        self.running = True
+        self._task = asyncio.get_running_loop().create_task(self._pump())
+    
+    async def _pump(self):
+        """Publish decoded PCM to the feeders, restarting the decoder if it exits."""
+        while self.running:
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    *self.build_decoder_command(),
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    preexec_fn=CorePlacer.preexec(self.cpu_core)
+                )
+                remainder = b''
+                while self.running:
+                    chunk = await self.process.stdout.read(65536)
+                    if not chunk:
+                        break
+                    # Publish whole sample frames only
+                    chunk = remainder + chunk
+                    usable = len(chunk) - len(chunk) % self.frame_size
+                    chunk, remainder = chunk[:usable], chunk[usable:]
+                    for tap in self.taps:
+                        chunk = tap(chunk) or chunk
+                    self.buffer.write(chunk)
+                    for data_ready in self._readers:
+                        data_ready.set()
+            except Exception as e:
+                print(f"[bus:{self.source_file.name}] Decoder error: {e}")
+            if self.process and self.process.returncode is None:
+                try:
+                    self.process.kill()
+                except ProcessLookupError:
+                    pass  # Exited, not reaped yet
+                await self.process.wait()
+            if self.running:
+                print(f"[bus:{self.source_file.name}] Decoder ended, restarting in 1 second...")
+                await asyncio.sleep(1)
+    
+    async def feed(self, process: asyncio.subprocess.Process):
+        """Copy live PCM from the bus to a process's stdin until the process exits or the bus stops."""
+        data_ready = asyncio.Event()
+        self._readers.add(data_ready)
+        read_pos = self.buffer.write_pos  # Join live, not from the oldest buffered audio
+        try:
+            while self.running and process.returncode is None:
+                await data_ready.wait()
+                data_ready.clear()
+                if not self.running:
+                    break
+                data, read_pos, _ = self.buffer.read(read_pos)
+                if data:
+                    process.stdin.write(data)
+                    await process.stdin.drain()
+        except (ConnectionError, OSError):
+            pass  # Encoder exited
+        finally:
+            self._readers.discard(data_ready)
+    
+    async def stop(self):
+        """Stop the decoder and feeders."""
+        self.running = False
+        for data_ready in self._readers:
+            data_ready.set()
+        if self.process and self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass  # Exited, not reaped yet
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self.process and self.process.returncode is None:
+            await self.process.wait()
+
+
+class EncoderStats:
+    """
+    Live telemetry of one ffmpeg process, parsed from its -progress output.
+    
+    ffmpeg writes key=value lines and ends every report with a progress=continue
+    (or progress=end) line; values become visible when a report is complete.
+    
+    The tee muxer reports total_size and bitrate as N/A. Those stay unknown
+    (None), or are estimated from out_time and the configured bitrate when
+    nominal_bitrate is given; estimated marks which.
+    """
+    
+    def __init__(self, nominal_bitrate: Optional[int] = None):
+        """
+        Initialize empty stats.
+        
+        Args:
+            nominal_bitrate: Configured output bits per second of the process (one copy of
+                each encoded variant), used to estimate size and bitrate ffmpeg does not report
+        """
+        self.nominal_bitrate = nominal_bitrate
+        self.started_at = time.monotonic()
+        self.updated_at = None
+        self.progressed_at = self.started_at  # Last report in which output time or size advanced
+        self.reports = 0
+        self.out_time = 0.0  # Seconds of audio output so far
+        self.speed = None  # Processing speed relative to real time (1.0 = real time)
+        self.total_size = None  # Bytes muxed so far (None: not reported)
+        self.bitrate = None  # Output bitrate in kbit/s (None: not reported)
+        self.estimated = False  # True when total_size and bitrate are estimates
+        self.drop_frames = 0
+        self.dup_frames = 0
+        self.progress = None  # 'continue' or 'end'
+        self._anchor = None  # Wall clock time at which out_time was 0, from the first report
+        self._pending = {}
+    
+    def feed_line(self, line: str) -> bool:
+        """
+        Consume one line of -progress output.
+        
+        Returns:
+            True if the line was a progress key=value line, False otherwise
+        """
+        key, sep, value = line.strip().partition('=')
+        if not sep or not key or ' ' in key:
+            return False
+        self._pending[key] = value.strip()
+        if key == 'progress':
+            self._apply(self._pending)
+            self._pending = {}
+        return True
+    
+    def _apply(self, report: Dict[str, str]):
+        """Apply a complete progress report."""
+        now = time.monotonic()
+        out_time, total_size = self.out_time, self.total_size
+        out_time_us = report.get('out_time_us') or report.get('out_time_ms')  # Both are microseconds
+        try:
+            if out_time_us not in (None, 'N/A'):
+                self.out_time = int(out_time_us) / 1000000
+            if report.get('total_size', 'N/A') != 'N/A':
+                self.total_size = int(report['total_size'])
+            elif self.nominal_bitrate:
+                self.total_size = int(self.out_time * self.nominal_bitrate / 8)
+            self.drop_frames = int(report.get('drop_frames', self.drop_frames))
+            self.dup_frames = int(report.get('dup_frames', self.dup_frames))
+        except ValueError:
+            pass
+        speed = report.get('speed', '').rstrip('x').strip()
+        self.speed = float(speed) if re.fullmatch(r'[0-9.]+', speed) else None
+        bitrate = report.get('bitrate', '').replace('kbits/s', '').strip()
+        if re.fullmatch(r'[0-9.]+', bitrate):
+            self.bitrate = float(bitrate)
+        else:
+            self.bitrate = self.nominal_bitrate / 1000 if self.nominal_bitrate else None
+        self.estimated = bool(self.nominal_bitrate) and report.get('total_size', 'N/A') == 'N/A'
+        self.progress = report.get('progress')
+        if self.out_time > out_time or (self.total_size or 0) > (total_size or 0):
+            self.progressed_at = now
+        if self._anchor is None:
+            self._anchor = now - self.out_time
+        self.updated_at = now
+        self.reports += 1
+    
+    def restart_clock(self):
+        """Measure progress and lead/lag from now, for a process that was waiting as a standby."""
+        self.started_at = self.progressed_at = time.monotonic()
+        self._anchor = None
+    
+    def get_offset(self) -> Optional[float]:
+        """
+        Get the lead (positive) or lag (negative) of the output against the wall clock.
+        
+        Measured from the first report, so ffmpeg's startup time is not counted as lag.
+        
+        Returns:
+            Seconds ahead of (or behind) real time, or None before the first report
+        """
+        if self._anchor is None:
+            return None
+        return self.out_time - (self.updated_at - self._anchor)
+    
+    def as_dict(self) -> Dict:
+        """Get the stats as a dictionary."""
+        return {
+            'out_time': self.out_time,
+            'speed': self.speed,
+            'total_size': self.total_size,
+            'bitrate': self.bitrate,
+            'estimated': self.estimated,
+            'drop_frames': self.drop_frames,
+            'dup_frames': self.dup_frames,
+            'progress': self.progress,
+            'offset': self.get_offset(),
+            'reports': self.reports,
+            'age': None if self.updated_at is None else time.monotonic() - self.updated_at,
+            'idle': time.monotonic() - self.progressed_at,
+        }
+
+
+class CorePlacer:
+    """
+    Spreads ffmpeg processes across the CPUs this process may use.
+    
+    Each process is pinned to the core with the least assigned weight, where the
+    weight approximates its CPU cost. Only as many cores as the cgroup CPU quota
+    allows are used, so a container limited to 4 CPUs on a 32-core host packs its
+    processes onto 4 cores instead of spreading thin throttled work over 32.
+    """
+    
+    def __init__(self):
+        """Initialize the placer from the allowed CPU set and the cgroup quota."""
+        allowed = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+        quota = get_cgroup_cpu_limit()
+        if quota is not None:
+            allowed = allowed[:max(1, math.ceil(quota))]
+        self.cores = allowed
+        self.cpu_limit = quota
+        self.load = {core: 0.0 for core in self.cores}  # Assigned weight per core
+        self.assignments = {}  # Name -> (core, weight)
+        self._lock = threading.Lock()
+        self._last_stat = read_proc_stat_cpu_times()
+    
+    def assign(self, name: str, weight: float = 1.0) -> Optional[int]:
+        """
+        Assign a process to the least loaded core (reusing its previous core if it has one).
+        
+        Args:
+            name: Unique name of the process (e.g. group id)
+            weight: Relative CPU cost of the process
+            
+        Returns:
+            The chosen core, or None if affinity is not supported here
+        """
+        if not self.cores:
+            return None
+        with self._lock:
+            if name in self.assignments:
+                return self.assignments[name][0]
+            core = min(self.cores, key=lambda c: (self.load[c], c))
+            self.load[core] += weight
+            self.assignments[name] = (core, weight)
+            return core
+    
+    @staticmethod
+    def preexec(core: Optional[int]) -> Optional[Callable[[], None]]:
+        """
+        Get a preexec_fn that pins a child process to one core before it executes.
+        
+        The mask is set before exec, so every thread the program creates inherits it;
+        pinning a running pid would move only its main thread.
+        
+        Returns:
+            The preexec_fn, or None if there is nothing to pin
+        """
+        if core is None or not hasattr(os, 'sched_setaffinity'):
+            return None
+        
+        def pin():
+            try:
+                os.sched_setaffinity(0, {core})
+            except OSError:
+                pass  # Core no longer allowed; run unpinned
+        return pin
+    
+    def get_core_load(self) -> Dict[int, Dict]:
+        """
+        Get the per-core load view.
+        
+        Returns:
+            Dictionary of core to assigned weight, assigned process names and measured
+            busy percentage since the previous call (None if /proc/stat is unavailable)
+        """
+        current = read_proc_stat_cpu_times()
+        view = {}
+        with self._lock:
+            for core in self.cores:
+                busy = None
+                if core in current and core in self._last_stat:
+                    (busy_now, total_now), (busy_then, total_then) = current[core], self._last_stat[core]
+                    if total_now > total_then:
+                        busy = 100.0 * (busy_now - busy_then) / (total_now - total_then)
+                view[core] = {
+                    'weight': self.load[core],
+                    'processes': [name for name, (c, _) in self.assignments.items() if c == core],
+                    'busy_percent': busy,
+                }
+            self._last_stat = current
+        return view
+    
+    def print_core_load(self):
+        """Print the per-core load view."""
+        limit = f", cgroup limit {self.cpu_limit:g} CPU(s)" if self.cpu_limit is not None else ""
+        print(f"CPU placement across {len(self.cores)} core(s){limit}:")
+        for core, info in self.get_core_load().items():
+            busy = f"{info['busy_percent']:.0f}% busy" if info['busy_percent'] is not None else "busy n/a"
+            print(f"  CPU {core}: weight {info['weight']:g}, {busy}, {len(info['processes'])} process(es)")
 
 
 class AudioStreamer:
     """Streams audio files to one or more Icecast servers."""
     
-    def __init__(self, endpoints: List[StreamEndpoint], mp3_file: str = None):
+    def __init__(self, endpoints: List[StreamEndpoint], mp3_file: str = None,
+                 settings: Optional[StreamerSettings] = None):
         """
         Initialize the audio streamer.
         
         Args:
             endpoints: List of StreamEndpoint objects to stream to
             mp3_file: Optional path to MP3 file (legacy mode, when not using config)
+            settings: Optional global settings (defaults are used when omitted)
         """
         self.endpoints = endpoints
+        self.settings = settings or StreamerSettings()
         self.running = True
-        self.stream_groups = []  # Groups of endpoints by (file, bitrate)
+        self.stream_groups = []  # Groups of endpoints, one process each
         self.processes = {}  # Track processes by group identifier
+        self.source_probes = {}  # Cached probe results by source path
+        self.transcode_cache = TranscodeCache() if self.settings.transcode_cache else None
+        self.pcm_buses = {}  # Shared decoders by source path
+        self.core_placer = CorePlacer() if self.settings.cpu_affinity == 'spread' else None
+        self._loop = None  # Supervisor event loop while streaming
+        self._stop_event = None  # Set to make the supervisor shut down
+        self._status_conn = None  # Pipe to the master process, in a worker
+        self._startup = None  # StartupScheduler of the running supervisor
+        self.hosts = {}  # HostHealth by (host, port)
+        self._supervise_started = None  # Monotonic time the supervisor started
+        self.all_live_after = None  # Seconds from start until every group had sent audio
+        self.worker_status = {}  # Latest report of each worker, in the master process
         
         # For legacy mode, validate MP3 file exists
         if mp3_file:
@@ -123,67 +1727,474 @@ class AudioStreamer:
         if not self.endpoints:
             raise ValueError("At least one endpoint must be provided")
         
-        # Group endpoints by (source_file, bitrate)
+        # Plan which endpoints share a process and an encoder
         self._group_endpoints()
+        for group in self.stream_groups:
+            group.log_lines = collections.deque(maxlen=self.settings.log_lines)
+            group.backoff = self._new_backoff()
+            group.standby_backoff = self._new_backoff()
+    
+    def _new_backoff(self) -> RestartBackoff:
+        """Create a group's restart backoff from the settings."""
+        return RestartBackoff(
+            base_delay=self.settings.restart_delay,
+            max_delay=self.settings.restart_max_delay,
+            stable_after=self.settings.restart_stable_after,
+            breaker_failures=self.settings.circuit_breaker_failures,
+            breaker_cooldown=self.settings.circuit_breaker_cooldown
+        )
     
     def _group_endpoints(self):
-        """Group endpoints by (source_file, bitrate) combination."""
-        groups_dict = {}
+        """
+        Plan stream groups.
+        
+        Endpoints with the same source and encoding settings share a variant (one encoder).
+        Variants are then merged into one group (one process, one decode) per source file,
+        or kept one group per variant when group_by is 'source_bitrate'.
+        """
+        variants_dict = {}
         
         for endpoint in self.endpoints:
             # Use endpoint's source_file instead of shared mp3_file
             source_path = Path(endpoint.source_file)
-            key = (str(source_path.absolute()), endpoint.bitrate)
-            if key not in groups_dict:
-                groups_dict[key] = []
-            groups_dict[key].append(endpoint)
+            key = (str(source_path.absolute()), endpoint.get_variant_key(self.settings.encoder_preset))
+            if key not in variants_dict:
+                variants_dict[key] = []
+            variants_dict[key].append(endpoint)
+        
+        groups_dict = {}
+        for (file_path, variant_key), endpoint_list in variants_dict.items():
+            first = endpoint_list[0]
+            variant = StreamVariant(first.bitrate, endpoint_list, codec=first.codec,
+                                    sample_rate=first.sample_rate, channels=first.channels,
+                                    preset=first.preset or self.settings.encoder_preset)
+            group_key = file_path if self.settings.group_by == 'source' else (file_path, variant_key)
+            if group_key not in groups_dict:
+                groups_dict[group_key] = (file_path, [])
+            groups_dict[group_key][1].append(variant)
         
         # Create StreamGroup objects
-        for (file_path, bitrate), endpoint_list in groups_dict.items():
-            group = StreamGroup(Path(file_path), bitrate, endpoint_list)
-            self.stream_groups.append(group)
+        for file_path, variants in groups_dict.values():
+            for part, part_variants in enumerate(self._split_variants(variants)):
+                group = StreamGroup(Path(file_path), part_variants)
+                if len(part_variants) != len(variants) or part > 0:
+                    group.part = part
+                self.stream_groups.append(group)
+        
+        # In a cluster, keep only this node's share before probing or transcoding anything
+        if self.settings.cluster_members:
+            self._claim_groups()
+        
+        for group in self.stream_groups:
+            for variant in group.variants:
+                if self.settings.copy_mode == 'auto':
+                    probe = self._probe_source(group.mp3_file)
+                    variant.copy = probe is not None and variant.matches_source(probe)
+                if self.transcode_cache and not variant.copy:
+                    variant.cached_file = self.transcode_cache.get(group.mp3_file, variant)
+                    variant.copy = variant.cached_file is not None
+            # The built-in sender only parses MP3 frames
+            group.native = self.settings.native_sender and all(
+                variant.copy and variant.codec == 'mp3' for variant in group.variants)
+            if any(endpoint.critical for endpoint in group.endpoints) and not group.native:
+                if any(variant.copy for variant in group.variants):
+                    # A copied input flows as soon as ffmpeg starts; a standby would connect at once
+                    print(f"[{group.get_group_id()}] Warning: no warm standby for groups that copy their source")
+                else:
+                    # Primary and standby read the shared PCM bus; the standby's stdin stays
+                    # unfed, so the process is already running but has connected nothing
+                    group.warm_standby = True
+                    group.use_pcm_bus = True
+        
+        # Sources encoded by more than one process are decoded once onto a shared PCM bus
+        if self.settings.pcm_bus:
+            encoding_groups = {}
+            for group in self.stream_groups:
+                if not group.native and not all(variant.copy for variant in group.variants):
+                    encoding_groups.setdefault(str(group.mp3_file), []).append(group)
+            for groups in encoding_groups.values():
+                if len(groups) > 1:
+                    for group in groups:
+                        group.use_pcm_bus = True
+    
+    def _claim_groups(self):
+        """Keep only the groups this cluster node owns on the consistent hash ring."""
+        members = self.settings.cluster_members
+        node_id = self.settings.cluster_node_id or socket.gethostname()
+        if node_id not in members:
+            raise ValueError(f"Cluster node id {node_id!r} is not in cluster_members: {', '.join(members)}")
+        ring = ConsistentHashRing(members, self.settings.cluster_virtual_nodes)
+        total = len(self.stream_groups)
+        self.stream_groups = [group for group in self.stream_groups
+                              if ring.get_member(group.get_cluster_key()) == node_id]
+        print(f"Cluster node {node_id}: claimed {len(self.stream_groups)} of {total} group(s) "
+              f"({len(members)} member(s))")
+    
+    def _split_variants(self, variants: List[StreamVariant]) -> List[List[StreamVariant]]:
+        """Split a source's variants into per-process chunks of at most max_endpoints_per_process endpoints."""
+        limit = self.settings.max_endpoints_per_process
+        if not limit:
+            return [variants]
+        
+        chunks = []
+        current = []
+        count = 0
+        for variant in variants:
+            remaining = variant.endpoints
+            while remaining:
+                taken, remaining = remaining[:limit - count], remaining[limit - count:]
+                current.append(variant.with_endpoints(taken))
+                count += len(taken)
+                if count == limit:
+                    chunks.append(current)
+                    current = []
+                    count = 0
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _probe_source(self, source_path: Path) -> Optional[Dict]:
+        """
+        Probe a source file, or every file of a playlist, once.
+        
+        Returns:
+            Common audio parameters of the source, or None if they cannot be
+            determined or the files of a playlist differ
+        """
+        key = str(source_path)
+        if key not in self.source_probes:
+            if source_path.name.endswith('.audio-push-playlist.txt'):
+                probes = [probe_audio_file(path) for path in read_playlist_file(source_path)]
+            else:
+                probes = [probe_audio_file(source_path)]
+            if probes and all(probe is not None and probe == probes[0] for probe in probes):
+                self.source_probes[key] = probes[0]
+            else:
+                self.source_probes[key] = None
+        return self.source_probes[key]
     
     def build_ffmpeg_command(self, stream_group: StreamGroup):
         """Build the ffmpeg command for streaming to multiple endpoints."""
-        # Check if it's a playlist file (created from directory)
-        is_playlist = stream_group.mp3_file.name.endswith('.audio-push-playlist.txt')
+        # Machine-readable progress on stdout instead of the stats line on stderr;
+        # errors and warnings still go to the group's log
+        ffmpeg_cmd = [
+            'ffmpeg', '-nostats',
+            '-progress', 'pipe:1',
+            '-stats_period', f"{self.settings.stats_period:g}",
+        ]
         
-        ffmpeg_cmd = ['ffmpeg']
+        # The source is input 0 unless every variant plays from the transcode cache
+        # (or, for groups fed by the PCM bus, unless no variant copies the source);
+        # each cached variant adds its own pre-encoded input
+        input_streams = {}
+        source_stream = None
+        decode_stream = None
+        if stream_group.use_pcm_bus:
+            if any(variant.copy and variant.cached_file is None for variant in stream_group.variants):
+                ffmpeg_cmd.extend(self._build_input_args(stream_group.mp3_file))
+                source_stream = '0:a:0'
+            decode_stream = f"{ffmpeg_cmd.count('-i')}:a:0"
+            ffmpeg_cmd.extend(self._get_pcm_bus(stream_group.mp3_file).get_input_args())
+        elif any(variant.cached_file is None for variant in stream_group.variants):
+            ffmpeg_cmd.extend(self._build_input_args(stream_group.mp3_file))
+            source_stream = decode_stream = '0:a:0'  # First audio stream of the source
+        for variant in stream_group.variants:
+            if variant.cached_file is not None:
+                input_streams[id(variant)] = f"{ffmpeg_cmd.count('-i')}:a:0"
+                ffmpeg_cmd.extend(self._build_input_args(variant.cached_file))
         
-        if is_playlist:
-            # Use concat demuxer for playlist files (directory of files)
-            ffmpeg_cmd.extend([
-                '-f', 'concat',  # Use concat demuxer
-                '-safe', '0',  # Allow unsafe file names
-                '-stream_loop', '-1',  # Loop the playlist indefinitely
-                '-i', str(stream_group.mp3_file),  # Playlist file
-            ])
+        # The tee muxer opens its slaves with the first encoded packet instead of at startup,
+        # which is what lets a warm standby wait without holding the mounts
+        use_tee = stream_group.warm_standby or (self.settings.fanout == 'tee' and len(stream_group.endpoints) > 1)
+        if use_tee:
+            # One encoded stream per variant, shared by all of its endpoints
+            legs = [(variant, variant.endpoints) for variant in stream_group.variants]
         else:
-            # Regular single file input
+            # One encoded stream per endpoint
+            legs = [(variant, [endpoint]) for variant in stream_group.variants
+                    for endpoint in variant.endpoints]
+        
+        # Copy legs map the input stream directly and never touch the decoder.
+        # Decode once; split the decoded audio when more than one encoder needs it
+        encoded = [index for index, (variant, _) in enumerate(legs) if not variant.copy]
+        labels = [input_streams.get(id(variant), source_stream if variant.copy else decode_stream)
+                  for variant, _ in legs]
+        if len(encoded) > 1:
+            ffmpeg_cmd.extend(['-filter_complex', self._build_split_filter(legs, encoded, decode_stream)])
+            for index in encoded:
+                labels[index] = f"[a{index}]"
+        
+        if use_tee:
+            slaves = []
+            for index, ((variant, endpoints), label) in enumerate(zip(legs, labels)):
+                ffmpeg_cmd.extend(['-map', label])
+                ffmpeg_cmd.extend(self._build_encoder_args(variant, index))
+                select = index if len(legs) > 1 else None
+                onfail = 'ignore' if self.settings.endpoint_isolation else None
+                slaves.extend(endpoint.get_tee_slave(select=select, onfail=onfail) for endpoint in endpoints)
             ffmpeg_cmd.extend([
-                '-re',  # Read input at native frame rate (important for streaming)
-                '-stream_loop', '-1',  # Loop the input indefinitely
-                '-i', str(stream_group.mp3_file),  # Input file
+                '-f', 'tee',  # Fan out to all slaves
+                "|".join(slaves)
             ])
+            return ffmpeg_cmd
         
         # For each endpoint in the group, add output parameters
         # FFmpeg processes outputs sequentially, so each needs its own encoding params
-        for endpoint in stream_group.endpoints:
-            # Map the audio stream and add encoding parameters for this output
+        for (variant, endpoints), label in zip(legs, labels):
+            endpoint = endpoints[0]
+            ffmpeg_cmd.extend(['-map', label])
+            ffmpeg_cmd.extend(self._build_encoder_args(variant, 0))
             ffmpeg_cmd.extend([
-                '-map', '0:a:0',  # Map the first audio stream from input
-                '-acodec', 'libmp3lame',  # Audio codec (MP3)
-                '-ab', stream_group.bitrate,  # Audio bitrate
-                '-ar', '44100',  # Sample rate
-                '-ac', '2',  # Audio channels (stereo)
-                '-f', 'mp3',  # Output format
-                '-content_type', 'audio/mpeg',  # Content type
+                '-f', endpoint.container,  # Output format
+                '-content_type', endpoint.content_type,  # Content type
                 '-ice_name', endpoint.stream_name,  # Stream name
                 endpoint.get_icecast_url()  # Output URL
             ])
         
         return ffmpeg_cmd
     
+    def _build_split_filter(self, legs: List[Tuple[StreamVariant, List[StreamEndpoint]]],
+                            encoded: List[int], decode_stream: str) -> str:
+        """
+        Build the filter graph that feeds every encoded leg from one decode.
+        
+        The decoded audio is converted once per distinct output format (sample rate,
+        channels) and each format is split into one output per encoder, labelled
+        [a<leg index>]. Formats set to 'source' are passed through without resampling.
+        """
+        formats = {}
+        for index in encoded:
+            formats.setdefault(legs[index][0].get_output_format(), []).append(index)
+        
+        chains = []
+        if len(formats) > 1:
+            format_labels = [f"[f{n}]" for n in range(len(formats))]
+            chains.append(f"[{decode_stream}]asplit={len(formats)}{''.join(format_labels)}")
+        else:
+            format_labels = [f"[{decode_stream}]"]
+        
+        for format_label, ((sample_rate, channels), indices) in zip(format_labels, formats.items()):
+            aformat = []
+            if sample_rate != 'source':
+                aformat.append(f"sample_rates={sample_rate}")
+            if channels != 'source':
+                aformat.append(f"channel_layouts={CHANNEL_LAYOUTS.get(channels, f'{channels}c')}")
+            filters = [f"aformat={':'.join(aformat)}"] if aformat else []
+            if len(indices) > 1 or not filters:
+                filters.append(f"asplit={len(indices)}" if len(indices) > 1 else "anull")
+            chains.append(format_label + ",".join(filters) + "".join(f"[a{index}]" for index in indices))
+        return ";".join(chains)
+    
+    def _get_pcm_bus(self, source_file: Path) -> PcmDecodeBus:
+        """
+        Get (creating on first use) the shared PCM decoder of a source.
+        
+        The bus carries the source's own sample rate and channel count when they
+        can be probed, so variants set to 'source' are never resampled.
+        """
+        key = str(source_file)
+        if key not in self.pcm_buses:
+            probe = self._probe_source(source_file) or {}
+            self.pcm_buses[key] = PcmDecodeBus(
+                source_file,
+                sample_rate=probe.get('sample_rate') or 44100,
+                channels=probe.get('channels') or 2,
+                buffer_seconds=self.settings.pcm_bus_buffer_seconds
+            )
+        return self.pcm_buses[key]
+    
+    def _build_input_args(self, input_file: Path) -> List[str]:
+        """Build the ffmpeg input arguments for a source or cached file."""
+        # Check if it's a playlist file (created from directory)
+        is_playlist = input_file.name.endswith('.audio-push-playlist.txt')
+        
+        if is_playlist:
+            # Use concat demuxer for playlist files (directory of files)
+            return [
+                '-re',  # Read at native frame rate, otherwise the playlist is pushed as fast as possible
+                '-f', 'concat',  # Use concat demuxer
+                '-safe', '0',  # Allow unsafe file names
+                '-stream_loop', '-1',  # Loop the playlist indefinitely
+                '-i', str(input_file),  # Playlist file
+            ]
+        # Regular single file input
+        return [
+            '-re',  # Read input at native frame rate (important for streaming)
+            '-stream_loop', '-1',  # Loop the input indefinitely
+            '-i', str(input_file),  # Input file
+        ]
+    
+    def _build_encoder_args(self, variant: StreamVariant, index: int) -> List[str]:
+        """
+        Build the encoder arguments for one output stream.
+        
+        Args:
+            variant: Variant being encoded
+            index: Index of the audio stream within its output
+        """
+        if variant.copy:
+            return [f'-c:a:{index}', 'copy']  # Source already matches, no decode or encode
+        params = variant.get_encoder_params()
+        encoder_args = [
+            f'-c:a:{index}', params['codec'],  # Audio codec
+            f'-b:a:{index}', params['bitrate'],  # Audio bitrate
+        ]
+        if params['sample_rate'] != 'source':
+            encoder_args += [f'-ar:a:{index}', str(params['sample_rate'])]  # Sample rate
+        if params['channels'] != 'source':
+            encoder_args += [f'-ac:a:{index}', str(params['channels'])]  # Audio channels
+        for option, value in params['options'].items():
+            encoder_args += [f'-{option}:a:{index}', value]  # Encoder preset
+        return encoder_args
+    
+    @staticmethod
+    def _get_pacing(stream_group: StreamGroup) -> Optional[Dict]:
+        """
+        Get the lead/lag of a group's running process.
+        
+        Returns:
+            Dictionary with the offsets against real time in seconds (positive: ahead,
+            negative: behind), one per variant for the built-in sender and one per
+            process (from -progress reports) for ffmpeg, and the number of times the
+            built-in sender re-anchored (None for ffmpeg); None before any audio
+        """
+        process = stream_group.process
+        if isinstance(process, NativeStreamProcess) and process.returncode is None:
+            return {'offsets': process.get_pacing_offsets(), 'resyncs': process.get_pacing_resyncs()}
+        if stream_group.stats and stream_group.stats.get_offset() is not None:
+            return {'offsets': [stream_group.stats.get_offset()], 'resyncs': None}
+        return None
+    
+    def get_pacing_status(self) -> Dict[str, Dict]:
+        """
+        Get the lead/lag of every running group, including those run by prefork workers.
+        
+        Returns:
+            Dictionary of group id to the pacing entry of get_diagnostics()
+        """
+        return {group_id: info['pacing'] for group_id, info in self.get_diagnostics().items()
+                if info['pacing'] is not None}
+    
+    def get_backoff_status(self) -> Dict[str, Dict]:
+        """
+        Get the restart backoff state of every group, including those run by prefork workers.
+        
+        Returns:
+            Dictionary of group id to RestartBackoff.as_dict()
+        """
+        return {group_id: info['backoff'] for group_id, info in self.get_diagnostics().items()}
+    
+    def get_encoder_stats(self) -> Dict[str, Dict]:
+        """
+        Get the latest -progress telemetry of every ffmpeg group, including those run by prefork workers.
+        
+        Returns:
+            Dictionary of group id to EncoderStats.as_dict()
+        """
+        return {group_id: info['stats'] for group_id, info in self.get_diagnostics().items()
+                if info['stats'] is not None}
+    
+    def get_diagnostics(self) -> Dict[str, Dict]:
+        """
+        Get a diagnostic snapshot of every group.
+        
+        Returns:
+            Dictionary of group id to pid, exit code (None while running), restart,
+            stall and backoff state, encoder telemetry, pacing and the last lines
+            the group's processes wrote to stdout/stderr
+        """
+        if self.worker_status:
+            # Master process: the groups run in the workers
+            diagnostics = {}
+            for status in self.worker_status.values():
+                diagnostics.update(status['groups'])
+            return diagnostics
+        diagnostics = {}
+        for group in self.stream_groups:
+            process = group.process
+            diagnostics[group.get_group_id()] = {
+                'pid': getattr(process, 'pid', None),
+                'returncode': process.returncode if process else None,
+                'restarts': group.restarts,
+                'stalls': group.stalls,
+                'standby_pid': group.standby[0].pid if group.standby else None,
+                'preflight_error': group.preflight_error,
+                'backoff': group.backoff.as_dict(),
+                'stats': group.stats.as_dict() if group.stats else None,
+                'pacing': self._get_pacing(group),
+                'legs': {endpoint_id: self._get_leg_diagnostics(leg)
+                         for endpoint_id, (leg, _) in group.legs.items()},
+                'log': list(group.log_lines),
+            }
+        return diagnostics
+    
+    @staticmethod
+    def _get_leg_diagnostics(leg: StreamGroup) -> Dict:
+        """Get the state of an endpoint running apart from its group."""
+        process = leg.process
+        return {
+            'pid': getattr(process, 'pid', None),
+            'returncode': process.returncode if process else None,
+            'restarts': leg.restarts,
+            'backoff': leg.backoff.as_dict(),
+        }
+    
+    def print_diagnostics(self):
+        """Print the diagnostic snapshot of every group."""
+        for host_id, health in self.get_host_status().items():
+            if health['down']:
+                print(f"[host {host_id}] down for {health['down_for']:.0f}s, {health['failed_probes']} failed "
+                      f"probe(s), {health['waiting']} group(s) waiting")
+        if not self.worker_status:
+            startup = self.get_startup_status()
+            all_live = startup['all_live_after']
+            print(f"Startup: {startup['live']}/{startup['groups']} group(s) live, {startup['starting']} starting"
+                  + (f", all live after {all_live:.1f}s" if all_live is not None else ""))
+        for index, status in sorted(self.worker_status.items()):
+            print(f"[worker {index}] pid {status['pid']}, {len(status['groups'])} group(s), "
+                  f"last report {time.monotonic() - status['received_at']:.0f}s ago")
+        for group_id, info in self.get_diagnostics().items():
+            state = "running" if info['returncode'] is None else f"exited ({info['returncode']})"
+            standby = f", warm standby pid {info['standby_pid']}" if info['standby_pid'] else ""
+            print(f"[{group_id}] pid {info['pid']}, {state}, {info['restarts']} restart(s), "
+                  f"{info['stalls']} stall(s){standby}")
+            backoff = info['backoff']
+            if backoff['retry_in'] is not None:
+                circuit = ", circuit open" if backoff['circuit_open'] else ""
+                print(f"[{group_id}]   backoff: {backoff['failures']} consecutive failure(s), "
+                      f"next attempt in {backoff['retry_in']:.1f}s{circuit}")
+            if info['preflight_error']:
+                print(f"[{group_id}]   not started, preflight failed: {info['preflight_error']}")
+            for endpoint_id, leg in info['legs'].items():
+                if leg['backoff']['retry_in'] is not None:
+                    state = f"reconnecting in {leg['backoff']['retry_in']:.1f}s"
+                elif leg['pid'] is None:
+                    state = "starting"
+                else:
+                    state = "running" if leg['returncode'] is None else f"exited ({leg['returncode']})"
+                print(f"[{group_id}]   separate endpoint {endpoint_id}: pid {leg['pid']}, {state}, "
+                      f"{leg['restarts']} restart(s), {leg['backoff']['failures']} consecutive failure(s)")
+            stats = info['stats']
+            if stats and stats['reports']:
+                speed = f"{stats['speed']:.2f}x" if stats['speed'] is not None else "n/a"
+                bitrate = f"{stats['bitrate']:.1f} kbit/s" if stats['bitrate'] is not None else "n/a"
+                size = f"{stats['total_size']} bytes" if stats['total_size'] is not None else "size n/a"
+                if stats['estimated']:
+                    size, bitrate = f"~{size}", f"~{bitrate} (estimated)"
+                print(f"[{group_id}]   out_time {stats['out_time']:.1f}s, speed {speed}, "
+                      f"offset {stats['offset']:+.2f}s, {size}, {bitrate}, "
+                      f"dropped {stats['drop_frames']}, duplicated {stats['dup_frames']}, "
+                      f"last progress {stats['idle']:.0f}s ago")
+            pacing = info['pacing']
+            if pacing and pacing['resyncs'] is not None:
+                offsets = ", ".join(f"{offset:+.2f}s" for offset in pacing['offsets'])
+                print(f"[{group_id}]   pacing: offset {offsets}, {pacing['resyncs']} resync(s)")
+            print(f"[{group_id}]   last {len(info['log'])} log line(s):")
+            for line in info['log']:
+                print(f"[{group_id}]     {line}")
+        if self.core_placer:
+            self.core_placer.print_core_load()
+    
     def get_endpoint_id(self, endpoint: StreamEndpoint):
         """Get a unique identifier for an endpoint."""
         return f"{endpoint.host}:{endpoint.port}{endpoint.mount}"
@@ -194,9 +2205,11 @@ class AudioStreamer:
             print("Error: ffmpeg is not installed or not in PATH")
             sys.exit(1)
         
-        print(f"Starting stream to {len(self.endpoints)} Icecast endpoint(s)...")
+        endpoint_count = sum(len(group.endpoints) for group in self.stream_groups)
+        print(f"Starting stream to {endpoint_count} Icecast endpoint(s)...")
         print("-" * 60)
-        print(f"Grouped into {len(self.stream_groups)} stream group(s) by (file, bitrate)")
+        group_by = "file" if self.settings.group_by == 'source' else "(file, bitrate)"
+        print(f"Grouped into {len(self.stream_groups)} stream group(s) by {group_by}")
         print("-" * 60)
         
         # Display grouping information
@@ -205,116 +2218,834 @@ class AudioStreamer:
             is_playlist = group.mp3_file.name.endswith('.audio-push-playlist.txt')
             source_type = "Directory (playlist)" if is_playlist else "File"
             print(f"\nGroup: {group_id} ({len(group.endpoints)} endpoint(s))")
+            print(f"  Sender: {'built-in source client' if group.native else 'ffmpeg'}")
             print(f"  Source Type: {source_type}")
             print(f"  Source Path: {group.mp3_file}")
             if is_playlist:
                 # Count files in the playlist
                 try:
-                    with open(group.mp3_file, 'r') as f:
-                        file_count = len([line for line in f if line.strip().startswith("file ")])
-                    print(f"  Files in playlist: {file_count}")
+                    print(f"  Files in playlist: {len(read_playlist_file(group.mp3_file))}")
                 except:
                     pass
-            for endpoint in group.endpoints:
-                endpoint_id = self.get_endpoint_id(endpoint)
-                print(f"  → {endpoint.protocol.upper()}://{endpoint.host}:{endpoint.port}{endpoint.mount}")
-                print(f"    Stream Name: {endpoint.stream_name}")
-                print(f"    Username: {endpoint.username}")
-                print(f"    Bitrate: {endpoint.bitrate}")
+            for variant in group.variants:
+                if variant.cached_file is not None:
+                    encoding = f"copy (transcode cache: {variant.cached_file.name})"
+                elif variant.copy:
+                    encoding = "copy (source already matches)"
+                else:
+                    encoding = variant.get_encoder_params()['codec']
+                for endpoint in variant.endpoints:
+                    print(f"  → {endpoint.protocol.upper()}://{endpoint.host}:{endpoint.port}{endpoint.mount}")
+                    print(f"    Stream Name: {endpoint.stream_name}")
+                    print(f"    Username: {endpoint.username}")
+                    print(f"    Codec: {endpoint.codec} ({endpoint.container}, {endpoint.content_type})")
+                    print(f"    Bitrate: {endpoint.bitrate}")
+                    print(f"    Sample Rate: {endpoint.sample_rate}, Channels: {endpoint.channels}")
+                    print(f"    Encoding: {encoding}")
         
         print("-" * 60)
         print("\nPress Ctrl+C to stop streaming\n")
         
-        # Start a streaming thread for each group
-        threads = []
+        if self.core_placer:
+            self._place_groups()
+            self.core_placer.print_core_load()
+            print("-" * 60)
+        
+        if self.settings.workers > 1 and len(self.stream_groups) > 1:
+            if 'fork' in multiprocessing.get_all_start_methods():
+                self._run_master()
+                return
+            print("Warning: workers needs fork(); supervising all groups in this process")
+        
+        try:
+            asyncio.run(self._supervise())
+        except KeyboardInterrupt:
+            pass  # Shutdown already ran while the supervisor was cancelled
+    
+    def _shard_groups(self, count: int) -> List[List[StreamGroup]]:
+        """
+        Split the groups into at most count shards of similar size.
+        
+        Groups of the same source stay together, so a shared PCM bus is decoded
+        by one worker only.
+        """
+        by_source = {}
         for group in self.stream_groups:
-            thread = threading.Thread(target=self._stream_to_group, args=(group,), daemon=True)
-            thread.start()
-            threads.append(thread)
+            by_source.setdefault(group.mp3_file, []).append(group)
+        shards = [[] for _ in range(min(count, len(by_source)))]
+        for groups in sorted(by_source.values(), key=len, reverse=True):
+            min(shards, key=len).extend(groups)
+        return shards
+    
+    def _run_master(self):
+        """
+        Fork worker processes that each supervise a shard of the groups, and restart any that die.
         
+        Workers report their groups' diagnostics over a pipe every stats_period
+        seconds; the master waits on those pipes and on the workers' exit
+        sentinels together, so a crashed worker is noticed immediately.
+        """
+        context = multiprocessing.get_context('fork')
+        shards = self._shard_groups(self.settings.workers)
+        print(f"Prefork mode: {len(shards)} worker process(es)")
+        workers = [None] * len(shards)  # (process, status pipe) per shard
+        backoffs = [self._new_backoff() for _ in shards]
+        retry_at = [0.0] * len(shards)
         try:
-            # Monitor all groups
             while self.running:
-                time.sleep(2)
+                now = time.monotonic()
+                for index, shard in enumerate(shards):
+                    if workers[index] is None and now >= retry_at[index]:
+                        workers[index] = self._start_worker(context, index, shard)
+                        backoffs[index].record_start()
                 
+                waitables = {}
+                for index, worker in enumerate(workers):
+                    if worker is not None:
+                        waitables[worker[0].sentinel] = index
+                        waitables[worker[1]] = index
+                pending = [retry_at[index] - now for index, worker in enumerate(workers) if worker is None]
+                # Wake at least once a second to notice stop_streaming() from another thread
+                timeout = max(0.0, min(pending + [1.0]))
+                for ready in multiprocessing.connection.wait(list(waitables), timeout):
+                    index = waitables[ready]
+                    if workers[index] is None:
+                        continue
+                    process, conn = workers[index]
+                    if ready is conn:
+                        try:
+                            self.worker_status[index] = dict(conn.recv(), received_at=time.monotonic())
+                            continue
+                        except EOFError:
+                            pass  # Worker exited; handled through its sentinel
+                    if process.is_alive():
+                        continue
+                    process.join()
+                    conn.close()
+                    self._kill_worker_children(process)
+                    workers[index] = None
+                    if self.running:
+                        delay = backoffs[index].record_exit()
+                        retry_at[index] = time.monotonic() + delay
+                        print(f"[worker {index}] Exited (exit code {process.exitcode}), "
+                              f"restarting in {delay:.1f} seconds...")
+        finally:
+            self._stop_workers([worker for worker in workers if worker is not None])
+    
+    def _start_worker(self, context, index: int, shard: List[StreamGroup]) -> Tuple:
+        """Fork a worker process for a shard of groups."""
+        conn, child_conn = context.Pipe(duplex=False)
+        process = context.Process(target=self._run_worker, args=(shard, child_conn),
+                                  name=f"audio-push-worker-{index}")
+        process.start()
+        child_conn.close()
+        print(f"[worker {index}] Started (pid {process.pid}) with {len(shard)} group(s)")
+        return process, conn
+    
+    def _run_worker(self, shard: List[StreamGroup], conn):
+        """Supervise a shard of groups in a forked worker process."""
+        # Own process group, so the master can take down this worker's ffmpeg processes if it dies
+        os.setpgid(0, 0)
+        self.stream_groups = shard
+        self.worker_status = {}
+        self._status_conn = conn
+        try:
+            asyncio.run(self._supervise())
         except KeyboardInterrupt:
+            pass
+    
+    def _stop_workers(self, workers: List[Tuple]):
+        """Ask every worker to shut down and kill those that outlive their own shutdown deadline."""
+        started = time.monotonic()
+        for process, _ in workers:
+            if process.is_alive():
+                process.terminate()  # SIGTERM: the worker stops its own groups
+        # Each worker needs up to shutdown_timeout plus a moment to reap its killed processes
+        deadline = started + self.settings.shutdown_timeout + 2
+        for process, _ in workers:
+            process.join(max(0.0, deadline - time.monotonic()))
+        stragglers = [process for process, _ in workers if process.is_alive()]
+        for process in stragglers:
+            process.kill()
+        for process, conn in workers:
+            process.join()
+            if process in stragglers:
+                print(f"[{process.name}] Force stopped.")
+            self._kill_worker_children(process)
+            conn.close()
+        if workers:
+            print(f"All workers stopped in {time.monotonic() - started:.1f} seconds.")
+    
+    @staticmethod
+    def _kill_worker_children(process):
+        """Kill whatever a dead worker left running in its process group, so no orphan holds a mount."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # Nothing left
+    
+    async def _report_status(self):
+        """Send this worker's diagnostics to the master process every stats_period seconds."""
+        while self.running:
+            try:
+                self._status_conn.send({'pid': os.getpid(), 'groups': self.get_diagnostics()})
+            except (BrokenPipeError, OSError):
+                # Master is gone; nothing would restart this worker's groups consistently
+                print(f"Worker {os.getpid()} lost its master process, stopping")
+                self.stop_streaming()
+                return
+            await asyncio.sleep(self.settings.stats_period)
+    
+    async def _supervise(self):
+        """
+        Run every group on one event loop until stop_streaming() is called.
+        
+        Each group is a task that awaits its process's exit, so an idle streamer
+        sleeps in the event loop instead of polling from one thread per group.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        print(f"Child exit detection: {install_child_watcher(self._loop)}")
+        if not self.running:
+            self._stop_event.set()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(signum, self.stop_streaming)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: KeyboardInterrupt cancels this coroutine instead
+        
+        self._startup = StartupScheduler(self.settings.startup_concurrency, self.settings.startup_rate)
+        self._supervise_started = time.monotonic()
+        # Tasks queue for start slots in creation order, so create them by priority
+        ordered = sorted(self.stream_groups, key=lambda group: -group.priority)
+        tasks = [self._loop.create_task(self._stream_to_group(group)) for group in ordered]
+        if self.settings.stall_timeout:
+            tasks.append(self._loop.create_task(self._watch_stalls()))
+        if self._status_conn is not None:
+            tasks.append(self._loop.create_task(self._report_status()))
+        try:
+            await self._stop_event.wait()
+        finally:
             print("\n\nStopping all streams...")
-            self.stop_streaming()
+            self.running = False
+            for group in self.stream_groups:
+                tasks.extend(task for _, task in group.legs.values())
+                if group.standby_task is not None:
+                    tasks.append(group.standby_task)
+            tasks.extend(health.monitor_task for health in self.hosts.values() if health.monitor_task)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._shutdown()
+            self._loop = None
     
-    def _stream_to_group(self, stream_group: StreamGroup):
-        """Stream to a group of endpoints in a separate thread."""
+    async def _stream_to_group(self, stream_group: StreamGroup):
+        """Keep a group's process running, restarting it when it exits."""
         group_id = stream_group.get_group_id()
         
         while self.running and stream_group.running:
             try:
-                self._start_group_process(stream_group)
+                # Endpoints that reconnected on their own rejoin the group's process
+                await self._stop_legs(stream_group)
+                # A warm standby is already running: promote it without probes or a start slot
+                standby = self._take_standby(stream_group)
+                if standby is None:
+                    await self._wait_for_hosts(stream_group)
+                    await self._startup.acquire()
+                try:
+                    stream_group.backoff.record_start()
+                    stream_group.stalled = False
+                    await self._start_group_process(stream_group, standby)
+                    if stream_group.preflight_error:
+                        raise ConnectionError(f"preflight failed, ffmpeg not started: {stream_group.preflight_error}")
+                    if stream_group.process is None:
+                        raise RuntimeError("process did not start")
+                    if standby is None:
+                        await self._wait_live(stream_group)
+                finally:
+                    if standby is None:
+                        self._startup.release()
                 
-                # Monitor the process
-                while stream_group.process and stream_group.running and self.running:
-                    return_code = stream_group.process.poll()
-                    if return_code is not None:
-                        # Process ended
-                        if stream_group.running:
-                            endpoint_list = ", ".join([self.get_endpoint_id(e) for e in stream_group.endpoints])
-                            print(f"\n[{group_id}] Process ended, restarting in 3 seconds...")
-                            print(f"[{group_id}] Affected endpoints: {endpoint_list}")
-                            time.sleep(3)
-                            break
-                        else:
-                            break
-                    time.sleep(1)
+                return_code = await self._wait_process(stream_group.process)
+                await self._stop_legs(stream_group)
+                if stream_group.tasks:
+                    # Let the pipe drains take in ffmpeg's last words before reporting them
+                    await asyncio.wait(stream_group.tasks, timeout=1)
+                if stream_group.running:
+                    endpoint_list = ", ".join([self.get_endpoint_id(e) for e in stream_group.endpoints])
+                    if getattr(stream_group.process, 'error', None):
+                        stream_group.log_lines.append(f"Native sender error: {stream_group.process.error}")
+                    # A process the watchdog killed is always restarted
+                    restart = stream_group.stalled or self._should_restart(return_code)
+                    delay = stream_group.backoff.record_exit() if restart else None
+                    action = f"restarting in {delay:.1f} seconds" if restart else "not restarting"
+                    if restart and return_code != 0 and await self._check_hosts(stream_group):
+                        # Nowhere to stream to: wait for a host to come back instead of backing off
+                        delay = 0.0
+                        action = "waiting for its host(s) to recover"
+                    standby = stream_group.standby
+                    if restart and standby and standby[0].returncode is None and stream_group.backoff.failures <= 1:
+                        # First failure after a stable run: fail over now instead of backing off
+                        delay = 0.0
+                        action = "failing over to the warm standby"
+                    print(f"\n[{group_id}] Process ended (exit code {return_code}), {action}...")
+                    print(f"[{group_id}] Affected endpoints: {endpoint_list}")
+                    for line in list(stream_group.log_lines)[-5:]:
+                        print(f"[{group_id}]   {line}")
+                    if not restart:
+                        stream_group.running = False
+                        break
+                    await self._backoff(stream_group, delay)
+                    stream_group.restarts += 1
                     
             except Exception as e:
                 endpoint_list = ", ".join([self.get_endpoint_id(e) for e in stream_group.endpoints])
                 print(f"[{group_id}] Error: {e}")
                 print(f"[{group_id}] Affected endpoints: {endpoint_list}")
                 if stream_group.running:
-                    print(f"[{group_id}] Retrying in 5 seconds...")
-                    time.sleep(5)
+                    if stream_group.preflight_transient:
+                        # Another source (often this group's previous process on its way out) holds
+                        # the mount. The host is up, but a mount that stays taken must still back
+                        # off and open the breaker, without spinning when restart_delay is 0
+                        delay = stream_group.backoff.record_exit(min_base_delay=TRANSIENT_RETRY_DELAY)
+                    else:
+                        delay = stream_group.backoff.record_exit()
+                        if stream_group.preflight_error and await self._check_hosts(stream_group):
+                            print(f"[{group_id}] Waiting for its host(s) to recover...")
+                            continue
+                    print(f"[{group_id}] Retrying in {delay:.1f} seconds...")
+                    await self._backoff(stream_group, delay)
                 else:
                     break
+            finally:
+                self._cancel_group_tasks(stream_group)
     
-    def _start_group_process(self, stream_group: StreamGroup):
-        """Start an ffmpeg process for a group of endpoints."""
-        group_id = stream_group.get_group_id()
-        ffmpeg_cmd = self.build_ffmpeg_command(stream_group)
+    def _get_host(self, endpoint: StreamEndpoint) -> HostHealth:
+        """Get the shared health state of an endpoint's host."""
+        key = (endpoint.host, int(endpoint.port))
+        if key not in self.hosts:
+            self.hosts[key] = HostHealth(endpoint.host, int(endpoint.port), endpoint.protocol)
+        return self.hosts[key]
+    
+    def _get_group_hosts(self, stream_group: StreamGroup) -> List[HostHealth]:
+        """Get the distinct hosts a group streams to."""
+        hosts = []
+        for endpoint in stream_group.endpoints:
+            health = self._get_host(endpoint)
+            if health not in hosts:
+                hosts.append(health)
+        return hosts
+    
+    async def _probe(self, health: HostHealth) -> bool:
+        """Probe a host, sharing one probe between every group checking it at the same time."""
+        if health.probe_task is None or health.probe_task.done():
+            health.probe_task = asyncio.ensure_future(probe_host(
+                health.host, health.port, protocol=health.protocol,
+                method=self.settings.host_probe, timeout=self.settings.host_probe_timeout))
+        return await asyncio.shield(health.probe_task)
+    
+    async def _check_hosts(self, stream_group: StreamGroup) -> bool:
+        """
+        Probe a failed group's hosts and mark the unreachable ones down.
         
+        Returns:
+            True if every host of the group is down
+        """
+        if self.settings.host_probe == 'none':
+            return False
+        hosts = self._get_group_hosts(stream_group)
+        unknown = [health for health in hosts if not health.down]
+        results = await asyncio.gather(*(self._probe(health) for health in unknown))
+        for health, reachable in zip(unknown, results):
+            if not reachable and not health.down:
+                health.down = True
+                health.down_since = time.monotonic()
+                health.failed_probes = 1
+                health.outages += 1
+                print(f"[host {health.host}:{health.port}] Unreachable, holding its groups until it recovers")
+                health.monitor_task = asyncio.ensure_future(self._monitor_host(health))
+        return all(health.down for health in hosts)
+    
+    async def _monitor_host(self, health: HostHealth):
+        """Probe a down host until it answers, then release its waiting groups in waves."""
+        while self.running:
+            await asyncio.sleep(self.settings.host_probe_interval)
+            if await self._probe(health):
+                break
+            health.failed_probes += 1
+        else:
+            return
+        wave = self.settings.host_release_wave
+        print(f"[host {health.host}:{health.port}] Back after {time.monotonic() - health.down_since:.1f} seconds, "
+              f"releasing waiting groups {wave} at a time")
+        # Groups failing from now on start right away; those already waiting go in waves
+        health.down = False
+        while health.release(wave) and self.running:
+            await asyncio.sleep(self.settings.host_release_interval)
+    
+    async def _wait_for_hosts(self, stream_group: StreamGroup):
+        """Hold a group whose hosts are all down until one of them releases it."""
+        hosts = self._get_group_hosts(stream_group)
+        if not hosts or not all(health.down for health in hosts):
+            return
+        host_list = ", ".join(f"{health.host}:{health.port}" for health in hosts)
+        print(f"[{stream_group.get_group_id()}] Waiting for {host_list} to recover")
+        futures = [health.wait_for_release() for health in hosts]
         try:
-            stream_group.process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                universal_newlines=True
+            await asyncio.wait(futures, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for future in futures:
+                future.cancel()
+        # Failures during the outage say nothing about the group itself
+        stream_group.backoff.reset()
+    
+    def get_host_status(self) -> Dict[str, Dict]:
+        """
+        Get the health of every destination host seen so far.
+        
+        Returns:
+            Dictionary of "host:port" to HostHealth.as_dict()
+        """
+        return {f"{host}:{port}": health.as_dict() for (host, port), health in self.hosts.items()}
+    
+    async def _wait_live(self, stream_group: StreamGroup):
+        """Hold the start slot until the group sends audio, its process exits or startup_timeout passes."""
+        deadline = time.monotonic() + self.settings.startup_timeout
+        process = stream_group.process
+        while not stream_group.is_live():
+            if process.returncode is not None or time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(0.05)
+        if stream_group.live_at is None:
+            stream_group.live_at = time.monotonic()
+            if self.all_live_after is None and all(group.live_at for group in self.stream_groups):
+                self.all_live_after = time.monotonic() - self._supervise_started
+                print(f"All {len(self.stream_groups)} group(s) live after {self.all_live_after:.1f} seconds")
+    
+    def get_startup_status(self) -> Dict:
+        """
+        Get the progress of startup.
+        
+        Returns:
+            Dictionary with the number of groups, how many have sent audio, how many
+            starts are in progress, and the seconds it took for all to go live (None until then)
+        """
+        return {
+            'groups': len(self.stream_groups),
+            'live': sum(1 for group in self.stream_groups if group.live_at is not None),
+            'starting': self._startup.in_progress if self._startup else 0,
+            'all_live_after': self.all_live_after,
+        }
+    
+    def _check_slave_failure(self, stream_group: StreamGroup, line: str) -> bool:
+        """
+        Watch a tee group's stderr for failed slaves and reconnect each one separately.
+        
+        Returns:
+            False, so the line is still kept in the group's log
+        """
+        match = TEE_SLAVE_FAILURE.search(line)
+        if match and stream_group.running and self.running:
+            endpoints = stream_group.endpoints
+            index = int(match.group(1))
+            if index < len(endpoints):
+                self._start_leg(stream_group, endpoints[index])
+        return False
+    
+    def _start_leg(self, stream_group: StreamGroup, endpoint: StreamEndpoint):
+        """
+        Serve an endpoint whose tee slave failed from its own process.
+        
+        The group's process keeps streaming to its other endpoints. The leg
+        reconnects with its own backoff and runs until the group's process
+        restarts, which takes the endpoint back.
+        """
+        endpoint_id = self.get_endpoint_id(endpoint)
+        if endpoint_id in stream_group.legs:
+            return
+        variant = next(v for v in stream_group.variants if endpoint in v.endpoints)
+        leg = StreamGroup(stream_group.mp3_file, [variant.with_endpoints([endpoint])])
+        leg.part = stream_group.part
+        leg.leg = endpoint
+        leg.use_pcm_bus = stream_group.use_pcm_bus
+        leg.cpu_core = stream_group.cpu_core
+        leg.log_lines = collections.deque(maxlen=self.settings.log_lines)
+        leg.backoff = self._new_backoff()
+        print(f"[{stream_group.get_group_id()}] Endpoint {endpoint_id} failed; "
+              f"other endpoints keep streaming, reconnecting it separately")
+        stream_group.legs[endpoint_id] = (leg, asyncio.ensure_future(self._run_leg(leg)))
+    
+    async def _run_leg(self, leg: StreamGroup):
+        """Wait out a first backoff delay, then keep a leg's process running."""
+        await asyncio.sleep(leg.backoff.record_exit())
+        await self._stream_to_group(leg)
+    
+    async def _stop_legs(self, stream_group: StreamGroup):
+        """
+        Stop the separately running endpoints of a group and wait for their processes to exit.
+        
+        Like _shutdown, every leg process is signalled at once and waited on
+        against one shutdown_timeout deadline before the rest are killed together.
+        """
+        legs, stream_group.legs = list(stream_group.legs.values()), {}
+        for leg, task in legs:
+            leg.running = False
+            task.cancel()
+        await asyncio.gather(*(task for _, task in legs), return_exceptions=True)
+        waits = {}
+        for leg, _ in legs:
+            process = self.processes.pop(leg.get_group_id(), None)
+            if process is None or process.returncode is not None:
+                continue
+            try:
+                process.terminate()
+            except ProcessLookupError:
+                pass  # Exited, not reaped yet
+            waits[asyncio.ensure_future(self._wait_process(process))] = process
+        if not waits:
+            return
+        _, pending = await asyncio.wait(waits, timeout=self.settings.shutdown_timeout)
+        if pending:
+            for task in pending:
+                try:
+                    waits[task].kill()
+                except ProcessLookupError:
+                    pass  # Exited, not reaped yet
+            _, pending = await asyncio.wait(pending, timeout=1)
+            for task in pending:
+                task.cancel()
+    
+    async def _watch_stalls(self):
+        """
+        Kill processes whose output has stopped advancing, so their group restarts.
+        
+        Catches what an exit code never shows: an encoder blocked on a half-open
+        connection or a full pipe, or a sender stuck in a write.
+        """
+        timeout = self.settings.stall_timeout
+        while self.running:
+            await asyncio.sleep(min(timeout / 4, self.settings.stats_period))
+            now = time.monotonic()
+            groups = self.stream_groups + [leg for group in self.stream_groups for leg, _ in group.legs.values()]
+            for group in groups:
+                process = group.process
+                if not group.running or group.stalled or process is None or process.returncode is not None:
+                    continue
+                last_progress = self._get_last_progress(group)
+                if last_progress is None or now - last_progress < timeout:
+                    continue
+                message = f"No progress for {now - last_progress:.0f} seconds, killing stalled process"
+                print(f"[{group.get_group_id()}] {message}")
+                group.log_lines.append(f"Stall watchdog: {message}")
+                group.stalled = True
+                group.stalls += 1
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass  # Exited, not reaped yet
+    
+    @staticmethod
+    def _get_last_progress(stream_group: StreamGroup) -> Optional[float]:
+        """Get the monotonic time at which a group's current process last produced output."""
+        if isinstance(stream_group.process, NativeStreamProcess):
+            return stream_group.process.get_last_progress()
+        if stream_group.stats is not None:
+            return stream_group.stats.progressed_at
+        return None
+    
+    @staticmethod
+    async def _backoff(stream_group: StreamGroup, delay: float):
+        """Wait out a group's restart delay, announcing when its circuit breaker has opened."""
+        backoff = stream_group.backoff
+        if backoff.circuit_open:
+            print(f"[{stream_group.get_group_id()}] Circuit open after {backoff.failures} consecutive "
+                  f"failures within {backoff.stable_after:g}s; parked for {delay:g} seconds")
+        await asyncio.sleep(delay)
+    
+    def _should_restart(self, return_code: int) -> bool:
+        """Apply the restart policy to a process's exit code."""
+        if self.settings.restart_policy == 'never':
+            return False
+        if self.settings.restart_policy == 'on_failure':
+            return return_code != 0
+        return True
+    
+    @staticmethod
+    async def _wait_process(process) -> int:
+        """Wait for an ffmpeg process or a built-in sender to exit."""
+        return await process.wait()
+    
+    @staticmethod
+    def _cancel_group_tasks(stream_group: StreamGroup):
+        """Cancel the pipe drain and feeder tasks of a group's last process."""
+        for task in stream_group.tasks:
+            task.cancel()
+        stream_group.tasks = []
+    
+    def _get_native_inputs(self, stream_group: StreamGroup) -> List[Tuple[List[Path], List[StreamEndpoint]]]:
+        """Get the files each variant of a native group loops over, with its endpoints."""
+        variant_inputs = []
+        for variant in stream_group.variants:
+            input_file = variant.cached_file or stream_group.mp3_file
+            if input_file.name.endswith('.audio-push-playlist.txt'):
+                files = read_playlist_file(input_file)
+            else:
+                files = [input_file]
+            variant_inputs.append((files, variant.endpoints))
+        return variant_inputs
+    
+    def _place_groups(self):
+        """
+        Assign every ffmpeg process (groups and shared decoders) to a core, heaviest first.
+        
+        A group's weight is one per encoder plus one for its decode; a group that only
+        copies is mostly I/O and weighs a quarter. Built-in sender groups run in this
+        process and are not placed.
+        """
+        weights = []
+        for group in self.stream_groups:
+            if group.native:
+                continue
+            encoders = sum(1 for variant in group.variants if not variant.copy)
+            decode = 0 if group.use_pcm_bus or not encoders else 1
+            weights.append((group, encoders + decode if encoders else 0.25))
+            if group.use_pcm_bus:
+                bus = self._get_pcm_bus(group.mp3_file)
+                if bus.cpu_core is None:
+                    bus.cpu_core = self.core_placer.assign(f"bus:{group.mp3_file.name}", 1.0)
+        for group, weight in sorted(weights, key=lambda item: -item[1]):
+            group.cpu_core = self.core_placer.assign(group.get_group_id(), weight)
+    
+    async def _start_group_process(self, stream_group: StreamGroup, standby: Optional[Tuple] = None):
+        """
+        Start an ffmpeg process (or the built-in sender) for a group of endpoints.
+        
+        Args:
+            stream_group: Group to start
+            standby: Warm standby taken with _take_standby() to promote instead of spawning
+        """
+        group_id = stream_group.get_group_id()
+        
+        if stream_group.native:
+            stream_group.process = NativeStreamProcess(
+                self._get_native_inputs(stream_group),
+                initial_burst=self.settings.pacing_initial_burst,
+                max_lag=self.settings.pacing_max_lag,
+                isolate_endpoints=self.settings.endpoint_isolation,
+                log=stream_group.log_lines
             )
             self.processes[group_id] = stream_group.process
             endpoint_list = ", ".join([self.get_endpoint_id(e) for e in stream_group.endpoints])
+            print(f"[{group_id}] Started native streaming to {len(stream_group.endpoints)} endpoint(s): {endpoint_list}")
+            return
+        
+        stream_group.preflight_transient = False
+        stream_group.preflight_error = None if standby else await self._preflight(stream_group)
+        if stream_group.preflight_error:
+            stream_group.process = None
+            return
+        
+        try:
+            if standby is not None:
+                stream_group.process, stream_group.stats, stream_group.tasks = standby
+                stream_group.stats.restart_clock()
+                print(f"[{group_id}] Warm standby (pid {stream_group.process.pid}) is taking over")
+            else:
+                stream_group.process, stream_group.stats, stream_group.tasks = await self._spawn_ffmpeg(stream_group)
+            if stream_group.use_pcm_bus:
+                bus = self._get_pcm_bus(stream_group.mp3_file)
+                if not bus.running:
+                    bus.start()
+                    print(f"[bus:{bus.source_file.name}] Decoding once for all processes")
+                stream_group.tasks.append(asyncio.ensure_future(bus.feed(stream_group.process)))
+            self.processes[group_id] = stream_group.process
+            endpoint_list = ", ".join([self.get_endpoint_id(e) for e in stream_group.endpoints])
             print(f"[{group_id}] Started streaming to {len(stream_group.endpoints)} endpoint(s): {endpoint_list}")
+            if stream_group.warm_standby and (stream_group.standby_task is None or stream_group.standby_task.done()):
+                stream_group.standby_task = asyncio.ensure_future(self._keep_standby(stream_group))
         except Exception as e:
             print(f"[{group_id}] Failed to start process: {e}")
             stream_group.process = None
     
+    async def _preflight(self, stream_group: StreamGroup) -> Optional[str]:
+        """
+        Check a group's endpoints before spending an ffmpeg process on them.
+        
+        Returns:
+            Why the group should not be started, or None to start it
+        """
+        if self.settings.preflight == 'none':
+            return None
+        results = await asyncio.gather(*(self._preflight_endpoint(e) for e in stream_group.endpoints))
+        failures = [(endpoint, error) for endpoint, error in zip(stream_group.endpoints, results) if error]
+        # Without isolation one failed output takes the whole process down; with it, a
+        # process is worth starting as long as one endpoint can be reached
+        if failures and (len(failures) == len(results) or not self.settings.endpoint_isolation):
+            stream_group.preflight_transient = all(
+                isinstance(error, IcecastMountInUseError) for _, error in failures)
+            return "; ".join(f"{self.get_endpoint_id(endpoint)}: {error}" for endpoint, error in failures)
+        return None
+    
+    async def _preflight_endpoint(self, endpoint: StreamEndpoint) -> Optional[OSError]:
+        """
+        Check one endpoint with a TCP connect or a full source handshake.
+        
+        Returns:
+            The error, or None if the endpoint looks usable
+        """
+        if self._get_host(endpoint).down:
+            return ConnectionError("host is down")
+        timeout = self.settings.preflight_timeout
+        if self.settings.preflight == 'tcp':
+            if await probe_host(endpoint.host, int(endpoint.port), protocol=endpoint.protocol, timeout=timeout):
+                return None
+            return ConnectionError("connection failed")
+        # A successful handshake claims the mount until the connection closes, and the
+        # server may not have let go of it by the time ffmpeg connects
+        client = IcecastSourceClient(endpoint, timeout=timeout)
+        try:
+            await client.connect()
+        except OSError as e:
+            return e if str(e) else ConnectionError(type(e).__name__)
+        finally:
+            client.close()
+        return None
+    
+    async def _spawn_ffmpeg(self, stream_group: StreamGroup) -> Tuple:
+        """
+        Start a group's ffmpeg process and the tasks draining its pipes.
+        
+        Returns:
+            (process, EncoderStats, drain tasks)
+        """
+        process = await asyncio.create_subprocess_exec(
+            *self.build_ffmpeg_command(stream_group),
+            stdin=subprocess.PIPE if stream_group.use_pcm_bus else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=CorePlacer.preexec(stream_group.cpu_core)
+        )
+        # Nothing else reads these pipes; if they filled up, ffmpeg would block on write
+        stats = EncoderStats(sum(parse_bitrate(v.bitrate) or 0 for v in stream_group.variants) or None)
+        check_slaves = None
+        if self.settings.endpoint_isolation and stream_group.leg is None:
+            check_slaves = lambda line: self._check_slave_failure(stream_group, line)
+        tasks = [
+            asyncio.ensure_future(drain_pipe(process.stdout, stream_group.log_lines,
+                                             line_handler=stats.feed_line)),
+            asyncio.ensure_future(drain_pipe(process.stderr, stream_group.log_lines,
+                                             line_handler=check_slaves)),
+        ]
+        return process, stats, tasks
+    
+    def _take_standby(self, stream_group: StreamGroup) -> Optional[Tuple]:
+        """Remove a group's warm standby for promotion; None if there is none or it has died."""
+        standby, stream_group.standby = stream_group.standby, None
+        self.processes.pop(f"{stream_group.get_group_id()} (standby)", None)
+        if standby is None:
+            return None
+        # The task watching this standby is done with it; a new one builds the next standby
+        stream_group.standby_task.cancel()
+        stream_group.standby_task = None
+        if standby[0].returncode is not None:
+            for task in standby[2]:
+                task.cancel()
+            return None
+        return standby
+    
+    async def _keep_standby(self, stream_group: StreamGroup):
+        """Keep a warm standby spawned for a group, rebuilding it whenever it is promoted or dies."""
+        group_id = stream_group.get_group_id()
+        backoff = stream_group.standby_backoff
+        # Let the primary settle first, so the two never start in the same instant
+        await asyncio.sleep(1)
+        while self.running and stream_group.running:
+            if stream_group.standby is None:
+                backoff.record_start()
+                try:
+                    stream_group.standby = await self._spawn_ffmpeg(stream_group)
+                except OSError as e:
+                    print(f"[{group_id}] Failed to start warm standby: {e}")
+                    await asyncio.sleep(backoff.record_exit())
+                    continue
+                process = stream_group.standby[0]
+                self.processes[f"{group_id} (standby)"] = process
+                print(f"[{group_id}] Warm standby ready (pid {process.pid})")
+            standby = stream_group.standby
+            await standby[0].wait()  # Cancelled instead if the standby is promoted
+            stream_group.standby = None
+            self.processes.pop(f"{group_id} (standby)", None)
+            delay = backoff.record_exit()
+            print(f"[{group_id}] Warm standby exited (exit code {standby[0].returncode}), "
+                  f"rebuilding in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+    
     def stop_streaming(self):
-        """Stop all streaming processes."""
+        """
+        Stop all streaming processes.
+        
+        Safe to call from signal handlers and other threads; start_streaming()
+        returns once every process has stopped.
+        """
         self.running = False
+        if self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:
+                pass  # Event loop already closed
+    
+    async def _shutdown(self):
+        """
+        Stop every group process against one deadline, then stop the shared decoders.
         
-        # Stop all groups
+        All processes get SIGTERM at once and are waited on together for up to
+        shutdown_timeout seconds; whichever are still running then are killed
+        together, so shutdown time does not grow with the number of groups.
+        """
+        started = time.monotonic()
+        # Stop all groups, including endpoints running apart from their group
         for group in self.stream_groups:
             group.running = False
-            if group.process:
-                group.process.terminate()
-        
-        # Wait for all processes to terminate
+            for leg, _ in group.legs.values():
+                leg.running = False
+        waits = {}
         for group_id, process in self.processes.items():
-            if process:
+            if process is None:
+                continue
+            if process.returncode is None:
                 try:
-                    process.wait(timeout=5)
-                    print(f"[{group_id}] Stream stopped.")
-                except subprocess.TimeoutExpired:
-                    process.kill()
-                    print(f"[{group_id}] Stream force stopped.")
+                    process.terminate()
+                except ProcessLookupError:
+                    pass  # Exited, not reaped yet
+            waits[asyncio.ensure_future(self._wait_process(process))] = (group_id, process)
+        
+        stopped, pending = set(), set()
+        if waits:
+            stopped, pending = await asyncio.wait(waits, timeout=self.settings.shutdown_timeout)
+        for task in stopped:
+            print(f"[{waits[task][0]}] Stream stopped.")
+        if pending:
+            for task in pending:
+                try:
+                    waits[task][1].kill()
+                except ProcessLookupError:
+                    pass  # Exited, not reaped yet
+            # SIGKILL cannot be ignored; this only waits for the exits to be reaped
+            reaped, pending = await asyncio.wait(pending, timeout=1)
+            for task in reaped:
+                print(f"[{waits[task][0]}] Stream force stopped.")
+            for task in pending:
+                task.cancel()
+                print(f"[{waits[task][0]}] Stream did not exit after SIGKILL.")
         
         self.processes.clear()
-        print("All streams stopped.")
+        
+        for bus in self.pcm_buses.values():
+            await bus.stop()
+        self.pcm_buses.clear()
+        forced = len(waits) - len(stopped)
+        print(f"All streams stopped in {time.monotonic() - started:.1f} seconds"
+              + (f" ({forced} of {len(waits)} force stopped)." if forced else "."))
     
     def check_ffmpeg(self):
         """Check if ffmpeg is available."""
@@ -328,6 +3059,29 @@ class AudioStreamer:
             return False
 
 
+# Logged by FFmpeg's tee muxer when a slave with onfail=ignore fails; slaves are numbered from 0
+TEE_SLAVE_FAILURE = re.compile(r'Slave muxer #(\d+) failed')
+
+
+def tee_escape(value: str, level: int = 2) -> str:
+    """
+    Escape a value for use inside an FFmpeg tee muxer output string.
+    
+    The tee output is tokenized twice: once to split slaves on '|' (level 1), and
+    once more to parse each slave's [key=value:...] options (level 2). Option values
+    are escaped at level 2 and the assembled slave string again at level 1.
+    
+    Args:
+        value: Raw value
+        level: 1 for a whole slave string, 2 for a slave option value
+        
+    Returns:
+        Escaped value
+    """
+    special = "\\'|" if level == 1 else "\\':[]="
+    return "".join(f"\\{c}" if c in special else c for c in str(value))
+
+
 def get_cache_dir() -> Path:
     """Get or create the cache directory."""
     cache_dir = Path.home() / '.cache' / 'audio-push'
@@ -476,6 +3230,336 @@ def create_playlist_file(audio_files: List[Path], playlist_path: Path) -> Path:
     return playlist_path
 
 
+def read_playlist_file(playlist_path: Path) -> List[Path]:
+    """
+    Read the audio file paths back from an FFmpeg concat playlist file.
+    
+    Args:
+        playlist_path: Path to a playlist created by create_playlist_file()
+        
+    Returns:
+        List of audio file paths, in playlist order
+    """
+    audio_files = []
+    with open(playlist_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("file '") and line.endswith("'"):
+                audio_files.append(Path(line[len("file '"):-1].replace("'\\''", "'")))
+    return audio_files
+
+
+async def drain_pipe(pipe: asyncio.StreamReader, lines: collections.deque, max_line_length: int = 1024,
+                     line_handler: Optional[Callable[[str], bool]] = None):
+    """
+    Read a child's pipe until EOF, keeping the last lines.
+    
+    Lines end at a newline or a carriage return (ffmpeg redraws status lines with
+    one) and are cut to max_line_length, so memory stays bounded by the deque's
+    maxlen however long the child runs or whatever it writes.
+    
+    Args:
+        pipe: Stream reader of a child process's stdout or stderr
+        lines: Bounded deque receiving the decoded lines
+        max_line_length: Maximum characters kept per line
+        line_handler: Optional callable offered every line first; lines it
+            returns True for are not added to the deque
+    """
+    partial = b''
+    try:
+        while True:
+            chunk = await pipe.read(4096)
+            if not chunk:
+                break
+            parts = re.split(b'[\r\n]', partial + chunk)
+            partial = parts.pop()[:max_line_length]
+            for part in parts:
+                if part.strip():
+                    line = part[:max_line_length].decode('utf-8', 'replace')
+                    if line_handler is None or not line_handler(line):
+                        lines.append(line)
+    except (OSError, ValueError):
+        pass  # Pipe closed
+    if partial.strip():
+        lines.append(partial.decode('utf-8', 'replace'))
+
+
+async def probe_host(host: str, port: int, protocol: str = 'http', method: str = 'tcp',
+                     timeout: float = 2.0) -> bool:
+    """
+    Check cheaply whether an Icecast host is reachable.
+    
+    Args:
+        host: Hostname or IP address
+        port: Port
+        protocol: 'http' or 'https' (TLS handshake included)
+        method: 'tcp' to only connect, 'http' to also expect an HTTP status line
+        timeout: Seconds allowed for each step
+    
+    Returns:
+        True if the host answered
+    """
+    context = ssl.create_default_context() if protocol == 'https' else None
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    try:
+        if method != 'http':
+            return True
+        writer.write(f"HEAD / HTTP/1.0\r\nHost: {host}\r\n\r\n".encode('ascii'))
+        await asyncio.wait_for(writer.drain(), timeout)
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return status_line.startswith(b'HTTP/')
+    except (OSError, asyncio.TimeoutError):
+        return False
+    finally:
+        writer.close()
+
+
+def install_child_watcher(loop: asyncio.AbstractEventLoop) -> str:
+    """
+    Make the event loop learn about child exits the moment they happen.
+    
+    Before Python 3.12 asyncio waits for each child from a dedicated thread.
+    Where Python (3.9+) and the kernel (Linux 5.3+) support it, a pidfd per child is watched by
+    the loop itself; otherwise a SIGCHLD handler (delivered through the loop's
+    signal self-pipe) reaps children. Python 3.12+ already uses pidfds when
+    available and is left alone.
+    
+    Args:
+        loop: Running event loop that will start the child processes
+    
+    Returns:
+        Name of the detection mechanism in use
+    """
+    if sys.version_info >= (3, 12) or sys.platform == 'win32':
+        return "asyncio default"
+    watcher = None
+    if hasattr(asyncio, 'PidfdChildWatcher') and hasattr(os, 'pidfd_open'):
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+            watcher, name = asyncio.PidfdChildWatcher(), "pidfd"
+        except OSError:
+            pass  # Kernel without pidfd_open
+    if watcher is None:
+        watcher, name = asyncio.SafeChildWatcher(), "SIGCHLD"
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+    return name
+
+
+def get_cgroup_cpu_limit() -> Optional[float]:
+    """
+    Get the CPU quota of this process's cgroup, in CPUs.
+    
+    Reads cgroup v2 cpu.max, falling back to cgroup v1 cfs_quota_us/cfs_period_us.
+    
+    Returns:
+        Number of CPUs the quota allows (may be fractional), or None if unlimited or unknown
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us', 'r') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us', 'r') as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def read_proc_stat_cpu_times() -> Dict[int, Tuple[int, int]]:
+    """
+    Read per-CPU (busy, total) jiffies from /proc/stat.
+    
+    Returns:
+        Dictionary of CPU number to (busy, total) counters; empty if unavailable
+    """
+    times = {}
+    try:
+        with open('/proc/stat', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if fields and fields[0].startswith('cpu') and fields[0] != 'cpu':
+                    values = [int(v) for v in fields[1:]]
+                    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+                    times[int(fields[0][3:])] = (sum(values) - idle, sum(values))
+    except (OSError, ValueError):
+        pass
+    return times
+
+
+def parse_audio_format_value(value, name: str):
+    """
+    Parse an endpoint sample_rate or channels value.
+    
+    Args:
+        value: Positive integer (or numeric string), or 'source'
+        name: Field name used in error messages
+        
+    Returns:
+        The integer value, or 'source'
+    """
+    if isinstance(value, str) and value.strip().lower() == 'source':
+        return 'source'
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        parsed = 0
+    if parsed <= 0:
+        raise ValueError(f"{name} must be a positive integer or 'source', got: {value}")
+    return parsed
+
+
+def parse_bitrate(bitrate: str) -> Optional[int]:
+    """
+    Convert an FFmpeg style bitrate ('128k', '1M', '96000') to bits per second.
+    
+    Returns:
+        Bitrate in bits per second, or None if it cannot be parsed
+    """
+    multipliers = {'k': 1000, 'm': 1000000}
+    value = str(bitrate).strip().lower()
+    try:
+        if value and value[-1] in multipliers:
+            return int(float(value[:-1]) * multipliers[value[-1]])
+        return int(value)
+    except ValueError:
+        return None
+
+
+def probe_audio_file(file_path: Path) -> Optional[Dict]:
+    """
+    Probe the first audio stream of a file with ffprobe.
+    
+    Args:
+        file_path: Path to the audio file
+        
+    Returns:
+        Dictionary with codec_name, bit_rate, sample_rate and channels,
+        or None if ffprobe is unavailable or the file cannot be probed
+    """
+    try:
+        result = subprocess.run(
+            ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+             '-show_entries', 'stream=codec_name,bit_rate,sample_rate,channels',
+             '-of', 'json', str(file_path)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            timeout=30,
+            check=True
+        )
+        stream = json.loads(result.stdout)['streams'][0]
+        return {
+            'codec_name': stream.get('codec_name'),
+            'bit_rate': int(stream['bit_rate']) if stream.get('bit_rate') else None,
+            'sample_rate': int(stream['sample_rate']) if stream.get('sample_rate') else None,
+            'channels': stream.get('channels'),
+        }
+    except (subprocess.SubprocessError, OSError, ValueError, KeyError, IndexError):
+        return None
+
+
+MP3_BITRATES = {
+    'mpeg1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    'mpeg2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0],
+}
+MP3_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],  # MPEG-2.5
+}
+
+
+def parse_mp3_frame_header(header: bytes) -> Optional[Tuple[int, float]]:
+    """
+    Parse a 4-byte MPEG audio Layer III frame header.
+    
+    Args:
+        header: The first four bytes of a candidate frame
+        
+    Returns:
+        (frame length in bytes, frame duration in seconds), or None if the bytes
+        are not a valid Layer III header
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer != 1 or sample_rate_index == 3:
+        return None
+    
+    bitrate = MP3_BITRATES['mpeg1' if version == 3 else 'mpeg2'][bitrate_index] * 1000
+    if not bitrate:
+        return None  # Free-format or invalid bitrate
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    samples = 1152 if version == 3 else 576
+    length = samples // 8 * bitrate // sample_rate + padding
+    return length, samples / sample_rate
+
+
+def iter_mp3_frames(file_path: Path) -> Iterator[Tuple[bytes, float]]:
+    """
+    Iterate over the MP3 frames of a file, skipping ID3 tags and junk data.
+    
+    Args:
+        file_path: Path to the MP3 file
+        
+    Yields:
+        (frame bytes, frame duration in seconds)
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(10)
+        if head[:3] == b'ID3' and len(head) == 10:
+            # ID3v2 tag: syncsafe size, plus a 10 byte footer if the footer flag is set
+            size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+            f.seek(10 + size + (10 if head[5] & 0x10 else 0))
+        else:
+            f.seek(0)
+        
+        buffer = b''
+        pos = 0
+        while True:
+            if len(buffer) - pos < 4 or (len(buffer) - pos < 2881):
+                # Keep at least one maximum-size frame buffered
+                chunk = f.read(65536)
+                if chunk:
+                    buffer = buffer[pos:] + chunk
+                    pos = 0
+                    continue
+                if len(buffer) - pos < 4:
+                    return
+            parsed = parse_mp3_frame_header(buffer[pos:pos + 4])
+            if parsed is None:
+                # Resynchronize on the next possible frame sync byte
+                next_sync = buffer.find(b'\xff', pos + 1)
+                if next_sync < 0:
+                    pos = len(buffer)
+                else:
+                    pos = next_sync
+                continue
+            length, duration = parsed
+            if len(buffer) - pos < length:
+                return  # Truncated final frame
+            yield buffer[pos:pos + length], duration
+            pos += length
+
+
 def resolve_source_file(source_file: str) -> str:
     """
     Resolve source file path, downloading from URL if necessary.
@@ -568,6 +3652,59 @@ def create_endpoints_from_config(config: Dict) -> List[StreamEndpoint]:
     return endpoints
 
 
+def benchmark_presets(source_file: str, codec: str = 'mp3', bitrate: str = '128k',
+                      seconds: float = 60.0) -> List[Dict]:
+    """
+    Measure the CPU cost of one stream at each encoder preset.
+    
+    Encodes `seconds` of the source (looped if shorter) as fast as possible into
+    the null muxer and reads the CPU time of the ffmpeg child from getrusage.
+    A decode-only run is measured first so the encoder's own share can be shown.
+    
+    Args:
+        source_file: Local audio file to encode
+        codec: Codec to benchmark, a key of CODECS
+        bitrate: Target bitrate
+        seconds: Seconds of audio to encode per run
+        
+    Returns:
+        One dictionary per run with preset, cpu_seconds and cpu_percent
+        (percent of one core used by one real-time stream)
+    """
+    import resource
+    
+    def run(output_args: List[str]) -> float:
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        subprocess.run(['ffmpeg', '-v', 'error', '-stream_loop', '-1', '-t', str(seconds),
+                        '-i', source_file, '-map', '0:a:0'] + output_args + ['-f', 'null', '-'],
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    
+    results = []
+    decode_cpu = run(['-c:a', 'pcm_s16le'])
+    results.append({'preset': 'decode only', 'cpu_seconds': decode_cpu,
+                    'cpu_percent': 100.0 * decode_cpu / seconds})
+    for preset in (None,) + PRESET_NAMES:
+        params = StreamVariant(bitrate, [], codec=codec, preset=preset).get_encoder_params()
+        output_args = ['-c:a', params['codec'], '-b:a', bitrate,
+                       '-ar', str(params['sample_rate']), '-ac', str(params['channels'])]
+        for option, value in params['options'].items():
+            output_args += [f'-{option}', value]
+        cpu = run(output_args)
+        results.append({'preset': preset or 'default', 'cpu_seconds': cpu,
+                        'cpu_percent': 100.0 * cpu / seconds,
+                        'encoder_cpu_percent': 100.0 * max(0.0, cpu - decode_cpu) / seconds})
+    return results
+
+
+def create_settings_from_config(config: Dict) -> StreamerSettings:
+    """Create StreamerSettings from the optional 'settings' section of the configuration."""
+    if isinstance(config, dict) and isinstance(config.get('settings'), dict):
+        return StreamerSettings(config['settings'])
+    return StreamerSettings()
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -580,6 +3717,9 @@ Examples:
   
   # Single endpoint via command line (legacy)
   %(prog)s -f audio.mp3 -H localhost -p 8000 -m /stream.mp3 -P mypassword
+  
+  # CPU cost per stream at each encoder preset
+  %(prog)s --benchmark audio.mp3 --benchmark-codec opus --benchmark-bitrate 64k
         """
     )
     
@@ -601,18 +3741,47 @@ Examples:
                        help='Icecast username (default: source, legacy)')
     parser.add_argument('-n', '--name', default='Audio Stream',
                        help='Stream name (default: Audio Stream, legacy)')
+    parser.add_argument('--benchmark', metavar='FILE',
+                       help='Report CPU per stream at each encoder preset for FILE, then exit')
+    parser.add_argument('--benchmark-codec', default='mp3', choices=list(CODECS),
+                       help='Codec to benchmark (default: mp3)')
+    parser.add_argument('--benchmark-bitrate', default='128k',
+                       help='Bitrate to benchmark (default: 128k)')
+    parser.add_argument('--benchmark-seconds', type=float, default=60.0,
+                       help='Seconds of audio encoded per preset (default: 60)')
+    parser.add_argument('--node-id',
+                       help='This node\'s id in cluster_members (default: cluster_node_id setting, then host name)')
     parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
     
     args = parser.parse_args()
     
+    if args.benchmark:
+        print(f"Benchmarking {args.benchmark_codec} at {args.benchmark_bitrate} "
+              f"({args.benchmark_seconds:g}s of audio per preset)...")
+        try:
+            results = benchmark_presets(args.benchmark, args.benchmark_codec,
+                                        args.benchmark_bitrate, args.benchmark_seconds)
+        except (subprocess.CalledProcessError, OSError, ImportError) as e:
+            print(f"Error running benchmark: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{'Preset':<12} {'CPU/stream':>11} {'Encoder only':>13} {'Streams/core':>13}")
+        for result in results:
+            encoder = result.get('encoder_cpu_percent')
+            encoder_str = f"{encoder:.2f}%" if encoder is not None else "-"
+            streams = 100.0 / result['cpu_percent'] if result['cpu_percent'] else float('inf')
+            print(f"{result['preset']:<12} {result['cpu_percent']:>10.2f}% {encoder_str:>13} {streams:>13.0f}")
+        sys.exit(0)
+    
     # Create endpoints
     endpoints = []
+    settings = StreamerSettings()
     
     if args.config:
         # Load from JSON config file
         try:
             config = load_config(args.config)
             endpoints = create_endpoints_from_config(config)
+            settings = create_settings_from_config(config)
         except Exception as e:
             print(f"Error loading configuration: {e}", file=sys.stderr)
             sys.exit(1)
@@ -644,13 +3813,17 @@ Examples:
         print("Error: No valid endpoints configured", file=sys.stderr)
         sys.exit(1)
     
+    if args.node_id:
+        settings.cluster_node_id = args.node_id
+    
     # Create streamer instance
     try:
         # In config mode, mp3_file is None (source files come from config)
         # In legacy mode, mp3_file is required
         streamer = AudioStreamer(
             endpoints=endpoints,
-            mp3_file=args.file if not args.config else None
+            mp3_file=args.file if not args.config else None,
+            settings=settings
         )
         
         # Set up signal handlers for graceful shutdown
@@ -660,6 +3833,9 @@ Examples:
         
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
+        if hasattr(signal, 'SIGUSR1'):
+            # kill -USR1 <pid> prints each group's state and recent ffmpeg output
+            signal.signal(signal.SIGUSR1, lambda signum, frame: streamer.print_diagnostics())
         
         # Start streaming
         streamer.start_streaming()